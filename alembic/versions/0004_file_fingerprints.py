@@ -0,0 +1,33 @@
+"""add FileFingerprints cache (path, size, mtime, inode -> md5) for incremental rescans
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'FileFingerprints',
+        sa.Column('directory', sa.Text(), nullable=False),
+        sa.Column('file_name', sa.Text(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=True),
+        sa.Column('mtime_ns', sa.BigInteger(), nullable=True),
+        sa.Column('inode', sa.BigInteger(), nullable=True),
+        sa.Column('md5_hash', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('directory', 'file_name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('FileFingerprints')
@@ -0,0 +1,27 @@
+"""add sampled content hash to FileFingerprints
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('FileFingerprints', sa.Column('sample_hash', sa.String(), nullable=True))
+    op.create_index('idx__FileFingerprints__size_sample_hash', 'FileFingerprints',
+                    ['size', 'sample_hash'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx__FileFingerprints__size_sample_hash', table_name='FileFingerprints')
+    op.drop_column('FileFingerprints', 'sample_hash')
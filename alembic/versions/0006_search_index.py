@@ -0,0 +1,112 @@
+"""add denormalized SearchIndex table for search and facet queries
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+import re
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same as db.timestamps.parse_recorded_at at the time of this revision, copied so the
+# migration's result doesn't change with it.
+_EXIF_DATE = re.compile(r'^(\d{4}):(\d{2}):(\d{2})')
+_FALLBACK_FORMATS = [
+    '%a %b %d %Y %H:%M:%S',
+    '%a %b %d %H:%M:%S %Y',
+    '%d.%m.%Y %H:%M:%S',
+    '%d.%m.%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %I:%M:%S %p',
+    '%Y-%m-%d',
+]
+
+
+def _parse_recorded_at(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    text = _EXIF_DATE.sub(r'\1-\2-\3', value.strip())
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = None
+        for fmt in _FALLBACK_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        if parsed is None:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+_ORDER = [sa.text('recorded_at DESC NULLS LAST'), 'file_name', 'md5_hash']
+_FILTER_COLS = ['media_type', 'country', 'camera_make', 'camera_model', 'video_codec']
+
+
+def upgrade() -> None:
+    op.create_table(
+        'SearchIndex',
+        sa.Column('md5_hash', sa.String(), nullable=False),
+        sa.Column('file_name', sa.Text(), nullable=True),
+        sa.Column('directory', sa.Text(), nullable=True),
+        sa.Column('media_type', sa.Text(), nullable=True),
+        sa.Column('recorded_at', sa.Text(), nullable=True),
+        sa.Column('recorded_at_ts', sa.DateTime(), nullable=True),
+        sa.Column('country', sa.Text(), nullable=True),
+        sa.Column('city', sa.Text(), nullable=True),
+        sa.Column('camera_make', sa.Text(), nullable=True),
+        sa.Column('camera_model', sa.Text(), nullable=True),
+        sa.Column('video_codec', sa.Text(), nullable=True),
+        sa.Column('keywords', postgresql.ARRAY(sa.Text()), nullable=True),
+        sa.PrimaryKeyConstraint('md5_hash'),
+    )
+
+    conn = op.get_bind()
+    conn.execute(sa.text('''
+        INSERT INTO "SearchIndex" (md5_hash, file_name, directory, media_type, recorded_at,
+                                   country, city, camera_make, camera_model, video_codec, keywords)
+        SELECT f.md5_hash, f.file_name, f.directory, f.media_type, fd.recorded_at,
+               l.country, l.city, pd.camera_make, pd.camera_model, vd.video_codec,
+               (SELECT array_agg(k.keyword ORDER BY k.keyword)
+                  FROM "FileKeywords" fk JOIN "Keywords" k ON k.id = fk.keyword_id
+                 WHERE fk.md5_hash = f.md5_hash)
+          FROM "Files" f
+          LEFT JOIN "FileDetails" fd ON fd.md5_hash = f.md5_hash
+          LEFT JOIN "Locations" l ON l.id = fd.location_id
+          LEFT JOIN "VideoDetails" vd ON vd.md5_hash = f.md5_hash
+          LEFT JOIN "PhotoDetails" pd ON pd.md5_hash = f.md5_hash
+    '''))
+    # The recorded_at formats (ffprobe, exiftool, DaVinci) are normalized in Python.
+    rows = conn.execute(sa.text(
+        'SELECT md5_hash, recorded_at FROM "SearchIndex" WHERE recorded_at IS NOT NULL'
+    )).fetchall()
+    updates = [{'md5_hash': md5_hash, 'ts': _parse_recorded_at(recorded_at)}
+               for md5_hash, recorded_at in rows]
+    updates = [u for u in updates if u['ts'] is not None]
+    if updates:
+        conn.execute(sa.text('UPDATE "SearchIndex" SET recorded_at_ts = :ts WHERE md5_hash = :md5_hash'),
+                     updates)
+
+    op.create_index('idx__SearchIndex__order', 'SearchIndex', _ORDER)
+    for col in _FILTER_COLS:
+        op.create_index(f'idx__SearchIndex__{col}', 'SearchIndex', [col, *_ORDER])
+    op.create_index('idx__SearchIndex__recorded_at_ts', 'SearchIndex', ['recorded_at_ts'])
+    op.create_index('idx__SearchIndex__keywords', 'SearchIndex', ['keywords'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_table('SearchIndex')
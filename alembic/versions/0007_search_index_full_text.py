@@ -0,0 +1,49 @@
+"""add full-text and trigram search over SearchIndex
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+import re
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('SearchIndex', sa.Column('search_text', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text('''
+        SELECT si.md5_hash, si.file_name, fd.description, si.keywords
+          FROM "SearchIndex" si
+          LEFT JOIN "FileDetails" fd ON fd.md5_hash = si.md5_hash
+    ''')).fetchall()
+    # Same document as db.database._search_text at the time of this revision.
+    updates = []
+    for md5_hash, file_name, description, keywords in rows:
+        stem = (file_name or '').rsplit('.', 1)[0]
+        parts = [file_name, re.sub(r'[\W_]+', ' ', stem).strip(), description, *(keywords or [])]
+        updates.append({'md5_hash': md5_hash, 'search_text': ' '.join(p for p in parts if p)})
+    if updates:
+        conn.execute(sa.text('UPDATE "SearchIndex" SET search_text = :search_text WHERE md5_hash = :md5_hash'),
+                     updates)
+
+    op.create_index('idx__SearchIndex__document', 'SearchIndex',
+                    [sa.text("to_tsvector('simple', search_text)")], postgresql_using='gin')
+    op.create_index('idx__SearchIndex__file_name_trgm', 'SearchIndex', ['file_name'],
+                    postgresql_using='gin', postgresql_ops={'file_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('idx__SearchIndex__file_name_trgm', table_name='SearchIndex')
+    op.drop_index('idx__SearchIndex__document', table_name='SearchIndex')
+    op.drop_column('SearchIndex', 'search_text')
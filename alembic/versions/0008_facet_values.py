@@ -0,0 +1,44 @@
+"""add FacetValues dictionary for facet autocomplete
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_FACET_FIELDS = ['country', 'camera_make', 'camera_model', 'video_codec']
+
+
+def upgrade() -> None:
+    op.create_table(
+        'FacetValues',
+        sa.Column('field', sa.Text(), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.Column('usage_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('field', 'value'),
+    )
+    for field in _FACET_FIELDS:
+        op.execute(f'''
+            INSERT INTO "FacetValues" (field, value, usage_count)
+            SELECT '{field}', {field}, count(*)
+              FROM "SearchIndex"
+             WHERE {field} IS NOT NULL
+             GROUP BY {field}
+        ''')
+    op.create_index('idx__FacetValues__field_usage_count', 'FacetValues',
+                    ['field', sa.text('usage_count DESC')])
+    op.create_index('idx__FacetValues__value_trgm', 'FacetValues', ['value'],
+                    postgresql_using='gin', postgresql_ops={'value': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_table('FacetValues')
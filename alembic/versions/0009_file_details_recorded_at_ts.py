@@ -0,0 +1,97 @@
+"""add normalized FileDetails.recorded_at_ts and order search results by it
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+import re
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same as db.timestamps.parse_recorded_at at the time of this revision, copied so the
+# migration's result doesn't change with it.
+_EXIF_DATE = re.compile(r'^(\d{4}):(\d{2}):(\d{2})')
+_FALLBACK_FORMATS = [
+    '%a %b %d %Y %H:%M:%S',
+    '%a %b %d %H:%M:%S %Y',
+    '%d.%m.%Y %H:%M:%S',
+    '%d.%m.%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %I:%M:%S %p',
+    '%Y-%m-%d',
+]
+
+
+def _parse_recorded_at(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    text = _EXIF_DATE.sub(r'\1-\2-\3', value.strip())
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = None
+        for fmt in _FALLBACK_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        if parsed is None:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+_FILTER_COLS = ['media_type', 'country', 'camera_make', 'camera_model', 'video_codec']
+_BATCH_SIZE = 10000
+
+
+def _recreate_search_indexes(order_col: str) -> None:
+    order = [sa.text(f'{order_col} DESC NULLS LAST'), 'file_name', 'md5_hash']
+    op.drop_index('idx__SearchIndex__order', table_name='SearchIndex')
+    op.create_index('idx__SearchIndex__order', 'SearchIndex', order)
+    for col in _FILTER_COLS:
+        op.drop_index(f'idx__SearchIndex__{col}', table_name='SearchIndex')
+        op.create_index(f'idx__SearchIndex__{col}', 'SearchIndex', [col, *order])
+
+
+def upgrade() -> None:
+    op.add_column('FileDetails', sa.Column('recorded_at_ts', sa.DateTime(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        'SELECT md5_hash, recorded_at FROM "FileDetails" WHERE recorded_at IS NOT NULL'
+    )).fetchall()
+    updates = [{'md5_hash': md5_hash, 'ts': _parse_recorded_at(recorded_at)}
+               for md5_hash, recorded_at in rows]
+    updates = [u for u in updates if u['ts'] is not None]
+    for start in range(0, len(updates), _BATCH_SIZE):
+        conn.execute(sa.text('UPDATE "FileDetails" SET recorded_at_ts = :ts WHERE md5_hash = :md5_hash'),
+                     updates[start:start + _BATCH_SIZE])
+    conn.execute(sa.text('''
+        UPDATE "SearchIndex" si SET recorded_at_ts = fd.recorded_at_ts
+          FROM "FileDetails" fd
+         WHERE fd.md5_hash = si.md5_hash
+           AND si.recorded_at_ts IS DISTINCT FROM fd.recorded_at_ts
+    '''))
+
+    op.create_index('idx__FileDetails__recorded_at_ts', 'FileDetails', ['recorded_at_ts'])
+    op.drop_index('idx__SearchIndex__recorded_at_ts', table_name='SearchIndex')
+    _recreate_search_indexes('recorded_at_ts')
+
+
+def downgrade() -> None:
+    _recreate_search_indexes('recorded_at')
+    op.create_index('idx__SearchIndex__recorded_at_ts', 'SearchIndex', ['recorded_at_ts'])
+    op.drop_index('idx__FileDetails__recorded_at_ts', table_name='FileDetails')
+    op.drop_column('FileDetails', 'recorded_at_ts')
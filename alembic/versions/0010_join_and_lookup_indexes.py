@@ -0,0 +1,33 @@
+"""add indexes for foreign keys, path lookups and fingerprint subtree scans
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx__FileDetails__location_id', 'FileDetails', ['location_id'])
+    op.create_index('idx__FileKeywords__keyword_id', 'FileKeywords', ['keyword_id'])
+    # Supersedes the directory-only index for get_tracked_files_in_directory as well.
+    op.create_index('idx__Files__directory_file_name', 'Files', ['directory', 'file_name'])
+    op.drop_index('idx__Files__directory', table_name='Files')
+    op.create_index('idx__FileFingerprints__directory_pattern', 'FileFingerprints', ['directory'],
+                    postgresql_ops={'directory': 'text_pattern_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('idx__FileFingerprints__directory_pattern', table_name='FileFingerprints')
+    op.create_index('idx__Files__directory', 'Files', ['directory'])
+    op.drop_index('idx__Files__directory_file_name', table_name='Files')
+    op.drop_index('idx__FileKeywords__keyword_id', table_name='FileKeywords')
+    op.drop_index('idx__FileDetails__location_id', table_name='FileDetails')
@@ -0,0 +1,84 @@
+"""store FileDetails.recorded_at_ts as local wall-clock time, drop its unused index
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same as db.timestamps.parse_recorded_at at the time of this revision, copied so the
+# migration's result doesn't change with it.
+_EXIF_DATE = re.compile(r'^(\d{4}):(\d{2}):(\d{2})')
+_FALLBACK_FORMATS = [
+    '%a %b %d %Y %H:%M:%S',
+    '%a %b %d %H:%M:%S %Y',
+    '%d.%m.%Y %H:%M:%S',
+    '%d.%m.%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %I:%M:%S %p',
+    '%Y-%m-%d',
+]
+
+
+def _parse_recorded_at(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    text = _EXIF_DATE.sub(r'\1-\2-\3', value.strip())
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = None
+        for fmt in _FALLBACK_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        if parsed is None:
+            return None
+    if parsed.utcoffset() == timedelta(0):
+        parsed = parsed.astimezone()
+    return parsed.replace(tzinfo=None)
+
+
+_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    # 0009 converted values with a UTC offset to UTC, while values without one (exiftool,
+    # DaVinci) were kept as local time; re-derive the timestamps that now differ.
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        'SELECT md5_hash, recorded_at, recorded_at_ts FROM "FileDetails" WHERE recorded_at IS NOT NULL'
+    )).fetchall()
+    updates = [{'md5_hash': md5_hash, 'ts': ts}
+               for md5_hash, recorded_at, old_ts in rows
+               if (ts := _parse_recorded_at(recorded_at)) != old_ts]
+    for start in range(0, len(updates), _BATCH_SIZE):
+        conn.execute(sa.text('UPDATE "FileDetails" SET recorded_at_ts = :ts WHERE md5_hash = :md5_hash'),
+                     updates[start:start + _BATCH_SIZE])
+    conn.execute(sa.text('''
+        UPDATE "SearchIndex" si SET recorded_at_ts = fd.recorded_at_ts
+          FROM "FileDetails" fd
+         WHERE fd.md5_hash = si.md5_hash
+           AND si.recorded_at_ts IS DISTINCT FROM fd.recorded_at_ts
+    '''))
+
+    # Search filters and sorts on SearchIndex.recorded_at_ts; nothing queries FileDetails by it.
+    op.drop_index('idx__FileDetails__recorded_at_ts', table_name='FileDetails')
+
+
+def downgrade() -> None:
+    # The column keeps the local-time values.
+    op.create_index('idx__FileDetails__recorded_at_ts', 'FileDetails', ['recorded_at_ts'])
@@ -147,6 +147,9 @@ class MapPoint(BaseModel):
 
 
 class FileSearchQuery(BaseModel):
+    # Free text over file names, descriptions and keywords; results are then ranked
+    # by relevance instead of by recording date.
+    text: Optional[str] = None
     media_types: list[str] = []
     keywords: list[str] = []
     country: Optional[str] = None
@@ -157,6 +160,10 @@ class FileSearchQuery(BaseModel):
     video_codec: Optional[str] = None
     page: int = Field(default=1, ge=1)
     page_size: int = Field(default=50, ge=1, le=200)
+    # next_cursor of the previous response; takes precedence over page.
+    cursor: Optional[str] = None
+    include_total: bool = True
+    include_facets: bool = False
 
 
 class SearchResult(BaseModel):
@@ -169,11 +176,20 @@ class SearchResult(BaseModel):
     city: Optional[str]
 
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
 class SearchResponse(BaseModel):
-    total: int
+    total: Optional[int]
     page: int
     page_size: int
     items: list[SearchResult]
+    next_cursor: Optional[str] = None
+    # Per facet (media_type, country, camera_make, camera_model, video_codec, keyword,
+    # year), the most frequent values among all matches; only with include_facets.
+    facets: Optional[dict[str, list[FacetCount]]] = None
 
 
 class FileInfo(BaseModel):
@@ -69,29 +69,25 @@ async def query_directory(query: DirectoryQuery) -> DirectoryResponse:
     return DirectoryResponse(total=total, page=query.page, page_size=query.page_size, items=items)
 
 
-def _build_file_info(p: Path, db: Database) -> FileInfo:
+def _build_file_info(p: Path, info: dict | None) -> FileInfo:
+    """FileInfo for p from its Database.get_file_info_by_path result (None if untracked)."""
     stat = p.stat()
-    db_record = db.get_file_by_path(str(p))
+    db_record = info['file'] if info else None
     video_details = None
     photo_details = None
     keywords = []
     location = None
-    if db_record:
-        md5 = db_record['md5_hash']
+    gps = None
+    if info:
         media_type = db_record['media_type']
-        keywords = db.get_keywords(md5)
-        loc_row = db.get_location_for_file(md5)
-        if loc_row:
-            location = LocationDto(**loc_row)
-        if media_type in ('video', '360_video'):
-            raw = db.get_video_details(md5)
-            if raw:
-                video_details = VideoDetails(**raw)
-        elif media_type in ('photo', '360_photo'):
-            raw = db.get_photo_details(md5)
-            if raw:
-                photo_details = PhotoDetails(**raw)
-    gps = db.get_file_gps(db_record['md5_hash']) if db_record else None
+        keywords = info['keywords']
+        gps = info['gps']
+        if info['location']:
+            location = LocationDto(**info['location'])
+        if media_type in ('video', '360_video') and info['video_details']:
+            video_details = VideoDetails(**info['video_details'])
+        elif media_type in ('photo', '360_photo') and info['photo_details']:
+            photo_details = PhotoDetails(**info['photo_details'])
     return FileInfo(
         name=p.name,
         path=str(p),
@@ -124,11 +120,11 @@ async def get_file_details(path: str) -> FileInfo:
     if p.is_dir():
         raise HTTPException(status_code=400, detail='Path is a directory')
 
-    return _build_file_info(p, Database())
+    return _build_file_info(p, Database().get_file_info_by_path(str(p)))
 
 
 @FilesApi.get('/exif')
-async def get_file_exif(path: str) -> list[ExifTag]:
+def get_file_exif(path: str) -> list[ExifTag]:
     root = Path(_env.get_root_dir())
     p = Path(path).resolve()
 
@@ -163,14 +159,15 @@ async def rename_file(request: RenameRequest) -> FileInfo:
         raise HTTPException(status_code=409, detail='A file with that name already exists')
 
     db = Database()
-    db_record = db.get_file_by_path(str(p))
+    info = db.get_file_info_by_path(str(p))
 
     p.rename(new_path)
 
-    if db_record:
-        db.rename_file(db_record['md5_hash'], new_name)
+    if info:
+        db.rename_file(info['file']['md5_hash'], new_name)
+        info['file']['file_name'] = new_name
 
-    return _build_file_info(new_path, db)
+    return _build_file_info(new_path, info)
 
 
 @FilesApi.get('/clip-preview/{md5_hash}')
@@ -216,7 +213,7 @@ async def assign_location(request: AssignLocationRequest) -> FileInfo:
         raise HTTPException(status_code=404, detail='File not found')
     db.assign_location(request.md5_hash, request.location_id)
     p = Path(db_record['directory']) / db_record['file_name']
-    return _build_file_info(p, db)
+    return _build_file_info(p, db.get_file_info_by_path(str(p)))
 
 
 @FilesApi.post('/checksum')
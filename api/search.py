@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 
 from api.dtos import FileSearchQuery, SearchResponse, SearchResult
 from db.database import Database
@@ -18,10 +18,15 @@ async def get_search_facets(
 @SearchApi.post('/search')
 async def search_files(query: FileSearchQuery) -> SearchResponse:
     db = Database()
-    total, rows = db.search_files(query.model_dump())
+    try:
+        total, rows, next_cursor, facets = db.search_files(query.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return SearchResponse(
         total=total,
         page=query.page,
         page_size=query.page_size,
         items=[SearchResult(**r) for r in rows],
+        next_cursor=next_cursor,
+        facets=facets,
     )
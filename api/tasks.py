@@ -4,6 +4,7 @@ from typing import List, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, StrictStr
 
+from tasks.mediaprocesses import MediaProcessStats, get_media_process_stats
 from tasks.taskmanager import TaskManager, TaskStatus
 
 TasksApi = APIRouter(prefix='/tasks')
@@ -26,6 +27,11 @@ async def get_tasks() -> List[TaskDescription]:
     return [TaskDescription(**t.model_dump()) for t in TaskManager().get_all_tasks()]
 
 
+@TasksApi.get('/media-processes')
+async def get_media_processes() -> MediaProcessStats:
+    return get_media_process_stats()
+
+
 @TasksApi.get('/{task_id}')
 async def get_task(task_id: str) -> TaskDescription:
     task = TaskManager().get_task(task_id)
@@ -1,23 +1,30 @@
 import logging
+import os
+import time
 from datetime import datetime
 from pathlib import Path
 from threading import Lock
-from typing import Callable
+from typing import Callable, Iterable, Iterator, TypeVar
 
 import pandas as pd
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 
 from api.dtos import FileQuery
 from davinci.davinciresolve import Metadata, DerivedMetadataColumns
-from db.database import Database
+from db.database import Database, DetailsBatcher
+from env.environment import Environment
 from ffmpeg.ffmpeg import FFmpegInput, FFmpeg, FFprobe
+from ffmpeg.proxies import find_video_proxy
 from photos.exif import probe_photo, generate_photo_thumbnail
 from scanner.scanner import Scanner, ScanResult
+from scanner.watcher import FootageWatcher
 from tasks.taskmanager import TaskManager, TaskRequest
-from tasks.workerpool import parallel_map
+from tasks.workerpool import parallel_imap, parallel_map, run_job
 
 TrackingApi = APIRouter(prefix='/tracking')
 
+T = TypeVar('T')
+
 VIDEO_TYPES = {'video', '360_video'}
 PHOTO_TYPES = {'photo', '360_photo'}
 
@@ -88,13 +95,19 @@ class _ProbeProgress:
     """Thread-safe completion counter — workers finish out of order, so the
     running tally is guarded by a lock and reported as 'done / total'."""
 
-    def __init__(self, total: int, report: Callable[[str], None]):
+    def __init__(self, total: int, report: Callable[[str], None], verb: str = 'Probed'):
         self._total = total
         self._report = report
+        self._verb = verb
         self._lock = Lock()
         self._done = 0
         self._failed = 0
 
+    def expect(self, count: int):
+        # Streaming scans discover files while earlier ones are already being probed.
+        with self._lock:
+            self._total += count
+
     def record(self, file_name: str, ok: bool):
         # Report inside the lock so both the count and the displayed message are
         # strictly monotonic — workers finish out of order, but the lock serialises
@@ -105,32 +118,147 @@ class _ProbeProgress:
             if not ok:
                 self._failed += 1
             suffix = f' ({self._failed} failed)' if self._failed else ''
-            self._report(f'Probed {self._done} / {self._total}{suffix}: {file_name}')
+            self._report(f'{self._verb} {self._done} / {self._total}{suffix}: {file_name}')
 
 
-def index_files_in_directory(query: FileQuery, report: Callable[[str], None]):
-    directory = Path(query.path)
-    report('Scanning files…')
-    scan_results = Scanner().scan_directory(directory)
-    total = len(scan_results)
-    report(f'Found {total} files, indexing…')
-    db = Database()
-    db.insert_scan_results(scan_results)
+# Files are upserted (and their fingerprints stored) in batches of up to this size while
+# the rest of the tree is still being walked and hashed. Batches start at a single file and
+# double, and a batch is also cut once it has been open for _SCAN_BATCH_SECONDS, so the
+# first files are browseable right after they are hashed even on slow shares.
+_SCAN_BATCH_SIZE = 200
+_SCAN_BATCH_SECONDS = 2.0
 
-    progress = _ProbeProgress(total, report)
 
-    def probe(sc: ScanResult):
-        ok = True
+def _scan_batches(items: Iterable[T]) -> Iterator[list[T]]:
+    batch: list[T] = []
+    size = 1
+    started = 0.0
+    for item in items:
+        if not batch:
+            started = time.monotonic()
+        batch.append(item)
+        if len(batch) >= size or time.monotonic() - started >= _SCAN_BATCH_SECONDS:
+            yield batch
+            batch = []
+            size = min(2 * size, _SCAN_BATCH_SIZE)
+    if batch:
+        yield batch
+
+
+def index_files_in_directory(query: FileQuery, report: Callable[[str], None]):
+    directory = Path(query.path).resolve()
+    db = Database()
+    report('Scanning files…')
+    scanner = Scanner(
+        find_fingerprints=db.get_fingerprints_for_paths,
+        sampled=Environment().get_scan_hash_mode() == 'sampled',
+        find_by_sample=db.find_md5_by_sample_hash,
+    )
+    progress = _ProbeProgress(0, report)
+
+    with db.details_batcher() as details:
+        def verify(sampled: list[ScanResult]):
+            db.insert_fingerprints(
+                _verify_sampled_hashes(sampled, db, details, query.generate_clip_preview, report))
+
+        def tracked():
+            # walk → hash (Scanner.iter_directory) → upsert in batches → probe (below). Each
+            # parallel stage keeps a bounded number of files in flight, so the first files
+            # are browseable within seconds and memory does not grow with the tree size.
+            sampled: list[ScanResult] = []
+            for batch in _scan_batches(scanner.iter_directory(directory)):
+                # Sample-matched MD5s are only assumptions until verified, so they stay out
+                # of Files for now rather than pointing an existing row at the wrong path.
+                db.insert_scan_results([sc for sc in batch if not sc.sampled_hash])
+                sampled.extend(sc for sc in batch if sc.sampled_hash)
+                if len(sampled) >= _SCAN_BATCH_SIZE:
+                    verify(sampled)
+                    sampled = []
+                # Unchanged files were fully probed on an earlier scan (their fingerprint is
+                # only stored after a successful probe), so only new or modified files are
+                # probed again.
+                changed = [sc for sc in batch if not sc.reused_hash and not sc.sampled_hash]
+                progress.expect(len(changed))
+                yield from changed
+            if sampled:
+                verify(sampled)
+
+        def probe(sc: ScanResult) -> ScanResult | None:
+            return sc if _probe_isolated(sc, db, details, query.generate_clip_preview, progress) else None
+
+        for batch in _scan_batches(parallel_imap(tracked(), probe)):
+            # Details must be stored before the fingerprint marks the file as probed.
+            details.flush()
+            db.insert_fingerprints([sc for sc in batch if sc is not None])
+
+        sampled_suffix = f', {scanner.sampled} sampled' if scanner.sampled else ''
+        report(f'Found {scanner.reused + scanner.sampled + scanner.hashed} files '
+               f'({scanner.reused} unchanged, {scanner.hashed} hashed{sampled_suffix})')
+
+
+def _probe_isolated(sc: ScanResult, db: Database, details: DetailsBatcher, generate_clip_preview: bool,
+                    progress: _ProbeProgress) -> bool:
+    ok = True
+    try:
+        _probe_and_save(sc, db, details, generate_clip_preview=generate_clip_preview)
+    except Exception:
+        # Isolate per-file failures so one bad file doesn't abort the whole scan.
+        logging.exception(f'Failed to probe {sc.directory}/{sc.file_name}')
+        ok = False
+    finally:
+        progress.record(sc.file_name, ok)
+    return ok
+
+
+def _probe_all(scan_results: list[ScanResult], db: Database, details: DetailsBatcher,
+               generate_clip_preview: bool, report: Callable[[str], None]) -> list[ScanResult]:
+    """Probe scan_results on the worker pool and return the ones that succeeded.
+    Their details are flushed by the time this returns."""
+    progress = _ProbeProgress(len(scan_results), report)
+    probed = parallel_map(scan_results,
+                          lambda sc: _probe_isolated(sc, db, details, generate_clip_preview, progress))
+    details.flush()
+    return [sc for sc, ok in zip(scan_results, probed) if ok]
+
+
+def _verify_sampled_hashes(scan_results: list[ScanResult], db: Database, details: DetailsBatcher,
+                           generate_clip_preview: bool, report: Callable[[str], None]) -> list[ScanResult]:
+    """Compute the full MD5 of files whose hash was inferred from a sample match, on the worker
+    pool but with at most half its workers, so concurrent scans keep the rest."""
+    scanner = Scanner()
+    progress = _ProbeProgress(len(scan_results), report, verb='Verified')
+
+    def verify(sc: ScanResult) -> ScanResult | None:
         try:
-            _probe_and_save(sc, db, generate_clip_preview=query.generate_clip_preview)
-        except Exception:
-            # Isolate per-file failures so one bad file doesn't abort the whole scan.
-            logging.exception(f'Failed to probe {sc.directory}/{sc.file_name}')
-            ok = False
-        finally:
-            progress.record(sc.file_name, ok)
+            md5_hash = scanner.md5_hash(sc.directory + '/' + sc.file_name)
+        except OSError:
+            logging.exception(f'Failed to verify {sc.directory}/{sc.file_name}')
+            progress.record(sc.file_name, False)
+            return None
+        progress.record(sc.file_name, True)
+        return sc.model_copy(update={'md5_hash': md5_hash, 'sampled_hash': False})
+
+    def device(sc: ScanResult) -> int:
+        try:
+            return os.stat(sc.directory).st_dev
+        except OSError:
+            return 0
+
+    verified: list[ScanResult] = []
+    mismatched: list[ScanResult] = []
+    max_pending = max(1, Environment().get_worker_pool_size() // 2)
+    for original, sc in zip(scan_results, parallel_imap(scan_results, verify, max_pending=max_pending,
+                                                        device=device)):
+        if sc is None:
+            continue
+        if sc.md5_hash == original.md5_hash:
+            verified.append(sc)
+        else:
+            logging.warning(f'Sample hash collision for {sc.directory}/{sc.file_name}, re-probing')
+            mismatched.append(sc)
 
-    parallel_map(scan_results, probe)
+    db.insert_scan_results(verified + mismatched)
+    return verified + _probe_all(mismatched, db, details, generate_clip_preview, report)
 
 
 def index_single_file(query: FileQuery, report: Callable[[str], None]):
@@ -143,10 +271,72 @@ def index_single_file(query: FileQuery, report: Callable[[str], None]):
     db = Database()
     db.insert_scan_results(scan_results)
     report('Probing file…')
-    _probe_and_save(sc, db, generate_clip_preview=query.generate_clip_preview)
+    with db.details_batcher() as details:
+        _probe_and_save(sc, db, details, generate_clip_preview=query.generate_clip_preview)
+
+
+def index_watched_files(paths: list[Path], report: Callable[[str], None]):
+    """Index files reported by the footage watcher; unchanged ones are skipped via their fingerprint."""
+    db = Database()
+    env = Environment()
+    generate_clip_preview = env.get_watch_generate_clip_preview()
+    report(f'Hashing {len(paths)} new or modified files…')
+    scanner = Scanner(
+        find_fingerprints=db.get_fingerprints_for_paths,
+        sampled=env.get_scan_hash_mode() == 'sampled',
+        find_by_sample=db.find_md5_by_sample_hash,
+    )
+    scan_results = [sc for sc in scanner.scan_files(paths) if not sc.reused_hash]
+    changed = [sc for sc in scan_results if not sc.sampled_hash]
+    db.insert_scan_results(changed)
+    with db.details_batcher() as details:
+        db.insert_fingerprints(_probe_all(changed, db, details, generate_clip_preview, report))
+        db.insert_fingerprints(_verify_sampled_hashes([sc for sc in scan_results if sc.sampled_hash],
+                                                      db, details, generate_clip_preview, report))
+
+
+def start_footage_watcher() -> FootageWatcher | None:
+    """Start watching ROOT_DIR if WATCH_MODE is enabled; every settled batch of files (or
+    rescan after missed events) is indexed as its own task so it shows up in the tasks widget."""
+    env = Environment()
+    mode = env.get_watch_mode()
+    if mode == 'off':
+        return None
+
+    def on_files_ready(paths: list[Path]):
+        TaskManager().run_task(
+            TaskRequest(
+                name='Index new footage',
+                description=f'Indexing {len(paths)} new or modified files under "{env.get_root_dir()}".',
+                method=lambda report: index_watched_files(paths, report)
+            )
+        )
+
+    def on_directory_changed(directory: Path):
+        TaskManager().run_task(
+            TaskRequest(
+                name='Rescan footage',
+                description=f'Rescanning "{directory}" after missed file system events.',
+                method=lambda report: index_files_in_directory(
+                    FileQuery(path=str(directory),
+                              generate_clip_preview=env.get_watch_generate_clip_preview()),
+                    report)
+            )
+        )
+
+    watcher = FootageWatcher(
+        Path(env.get_root_dir()),
+        on_files_ready,
+        on_directory_changed,
+        mode=mode,
+        settle_seconds=env.get_watch_settle_seconds(),
+        poll_interval_seconds=env.get_watch_poll_interval_seconds(),
+    )
+    watcher.start()
+    return watcher
 
 
-def _probe_and_save(sc: ScanResult, db: Database, generate_clip_preview: bool):
+def _probe_and_save(sc: ScanResult, db: Database, details: DetailsBatcher, generate_clip_preview: bool):
     file_path = sc.directory + '/' + sc.file_name
     last_modified_at = datetime.fromtimestamp(Path(file_path).stat().st_mtime).isoformat()
 
@@ -154,11 +344,11 @@ def _probe_and_save(sc: ScanResult, db: Database, generate_clip_preview: bool):
         probe = FFprobe().probe_file(md5_hash=sc.md5_hash, file_path=file_path)
         if probe is None:
             logging.warning(f'FFprobe failed for {file_path}')
-            _save_file_details(db, sc.md5_hash, last_modified_at, recorded_at=None)
+            _save_file_details(details, sc.md5_hash, last_modified_at, recorded_at=None)
             return
 
-        _save_file_details(db, sc.md5_hash, last_modified_at, recorded_at=probe.recorded_at)
-        db.insert_video_details(pd.DataFrame([probe.model_dump()]))
+        _save_file_details(details, sc.md5_hash, last_modified_at, recorded_at=probe.recorded_at)
+        details.add_video_details(probe.model_dump())
 
         if generate_clip_preview:
             create_clip_preview(probe)
@@ -166,34 +356,33 @@ def _probe_and_save(sc: ScanResult, db: Database, generate_clip_preview: bool):
     elif sc.media_type in PHOTO_TYPES:
         probe = probe_photo(md5_hash=sc.md5_hash, file_path=file_path)
         if probe is None:
-            _save_file_details(db, sc.md5_hash, last_modified_at, recorded_at=None)
+            _save_file_details(details, sc.md5_hash, last_modified_at, recorded_at=None)
         else:
-            _save_file_details(db, sc.md5_hash, last_modified_at, recorded_at=probe.recorded_at,
+            _save_file_details(details, sc.md5_hash, last_modified_at, recorded_at=probe.recorded_at,
                                latitude=probe.latitude, longitude=probe.longitude,
                                altitude=probe.altitude)
-            db.insert_photo_details(pd.DataFrame([probe.model_dump()]))
+            details.add_photo_details(probe.model_dump())
 
         if generate_clip_preview:
-            thumbnail = generate_photo_thumbnail(sc.md5_hash, file_path)
+            thumbnail = run_job('thumbnails', generate_photo_thumbnail, sc.md5_hash, file_path)
             if thumbnail:
                 db.insert_raw_preview(sc.md5_hash, thumbnail, identifier=sc.md5_hash)
 
     else:
-        _save_file_details(db, sc.md5_hash, last_modified_at, recorded_at=None)
+        _save_file_details(details, sc.md5_hash, last_modified_at, recorded_at=None)
 
 
-def _save_file_details(db: Database, md5_hash: str, last_modified_at: str, recorded_at: str | None,
+def _save_file_details(details: DetailsBatcher, md5_hash: str, last_modified_at: str, recorded_at: str | None,
                        latitude: float | None = None, longitude: float | None = None,
                        altitude: float | None = None):
-    df = pd.DataFrame([{
+    details.add_file_details({
         'md5_hash': md5_hash,
         'last_modified_at': last_modified_at,
         'recorded_at': recorded_at,
         'latitude': latitude,
         'longitude': longitude,
         'altitude': altitude,
-    }])
-    db.insert_file_details(df)
+    })
 
 
 def scan_files_in_metadata(query: FileQuery, report: Callable[[str], None]):
@@ -223,10 +412,7 @@ def scan_files_in_metadata(query: FileQuery, report: Callable[[str], None]):
 
     report('Writing to database…')
     db = Database()
-    db.insert_scan_results(scan_results)
-    db.insert_file_details(details_merged)
-    db.insert_video_details(details_merged)
-    db.insert_keywords(keywords_merged)
+    db.import_metadata(scan_results, _frame_records(details_merged), keywords_merged)
 
     if query.generate_clip_preview:
         for i, row in enumerate(details_merged.itertuples(index=True, name='Row'), 1):
@@ -239,7 +425,19 @@ def scan_files_in_metadata(query: FileQuery, report: Callable[[str], None]):
             create_clip_preview(ffmpeg_input)
 
 
+def _frame_records(df: pd.DataFrame) -> list[dict]:
+    """DataFrame rows as plain dicts, with NaN/NaT turned into None for the database."""
+    return df.astype(object).where(pd.notna(df), None).to_dict(orient='records')
+
+
 def create_clip_preview(input: FFmpegInput):
-    result = FFmpeg(input.md5_hash).generate_clip_preview(input)
+    ffmpeg = FFmpeg(input.md5_hash)
+    result = None
+    proxy = find_video_proxy(input.file_path)
+    if proxy is not None:
+        result = ffmpeg.generate_clip_preview(
+            FFmpegInput(md5_hash=input.md5_hash, file_path=proxy, duration=input.duration))
+    if result is None:
+        result = ffmpeg.generate_clip_preview(input)
     if result is not None:
         Database().insert_clip_preview(result, identifier=input.md5_hash)
@@ -16,11 +16,12 @@ from api.files import FilesApi
 from api.keywords import KeywordsApi
 from api.locations import LocationsApi
 from api.search import SearchApi
-from api.tracking import TrackingApi
+from api.tracking import TrackingApi, start_footage_watcher
 from api.tasks import TasksApi
 from api.troubleshoot import TroubleShootingApi
 from alembic import command
 from alembic.config import Config
+from db.database import Database
 from env.environment import Environment
 
 env = Environment()
@@ -46,11 +47,17 @@ async def lifespan(application: FastAPI):
     application.include_router(TasksApi)
     application.include_router(TroubleShootingApi)
 
+    watcher = start_footage_watcher()
+
     yield
 
+    if watcher is not None:
+        watcher.stop()
+
 
 if __name__ == '__main__':
     command.upgrade(Config('alembic.ini'), 'head')
+    Database().prepare_full_text_search()
 
     app = FastAPI(
         title='Footage Archive',
@@ -0,0 +1,45 @@
+"""Metadata import benchmark: one write per table vs. Database.import_metadata.
+
+    python -m db.benchmark_import [--url postgresql://.../scratch] [--files 100000]
+
+Imports --files synthetic DaVinci clips (Files, FileDetails, VideoDetails, 3 keywords each)
+into a fresh scratch database per variant (default: temporary SQLite files; --url must
+point at an empty database, whose schema is created and dropped again). The per-table
+variant is the import before import_metadata: four transactions, each refreshing the
+SearchIndex of every imported file.
+"""
+import argparse
+import time
+
+from db.database import Database
+from db.scratch import scratch_database, synthetic_metadata
+
+
+def per_table_import(db: Database, scan_results, details, keywords) -> None:
+    db.insert_scan_results(scan_results)
+    db.insert_file_details(details)
+    db.insert_video_details(details)
+    db.insert_keywords(keywords)
+
+
+def _measure(label: str, fn, url: str | None, data) -> None:
+    with scratch_database(url) as engine:
+        start = time.perf_counter()
+        fn(Database(), *data)
+        elapsed = time.perf_counter() - start
+    print(f'{engine.dialect.name:<10} {label:<28} {len(data[0]) / elapsed:8.0f} files/s  ({elapsed:.1f}s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None)
+    parser.add_argument('--files', type=int, default=100000)
+    args = parser.parse_args()
+
+    data = synthetic_metadata(args.files)
+    _measure('one write per table', per_table_import, args.url, data)
+    _measure('Database.import_metadata', Database.import_metadata, args.url, data)
+
+
+if __name__ == '__main__':
+    main()
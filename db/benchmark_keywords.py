@@ -0,0 +1,83 @@
+"""Keyword import benchmark: the former per-row loop vs. Database.insert_keywords.
+
+    python -m db.benchmark_keywords [--url postgresql://.../scratch] [--files 2000]
+                                    [--keywords-per-file 5] [--distinct 200]
+
+Runs against a scratch database (default: a temporary SQLite file; --url must point at
+an empty database, whose schema is created and dropped again). insert_keywords also
+refreshes the SearchIndex rows of the files it touches, which the old loop predates.
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import delete, select
+
+from db.database import Database
+from db.engine import get_engine, upsert_ignore
+from db.models import file_keywords_table, keywords_table
+from db.scratch import scratch_database
+from scanner.scanner import ScanResult
+
+
+def legacy_insert_keywords(keywords: pd.DataFrame) -> None:
+    """insert_keywords before it became set-based: three statements per (file, keyword) row."""
+    with get_engine().begin() as conn:
+        for _, row in keywords[['md5_hash', 'keyword']].iterrows():
+            conn.execute(upsert_ignore(keywords_table, [{'keyword': row['keyword']}], ['keyword']))
+            kw_id = conn.execute(
+                select(keywords_table.c.id).where(keywords_table.c.keyword == row['keyword'])
+            ).scalar()
+            conn.execute(upsert_ignore(file_keywords_table,
+                                       [{'md5_hash': row['md5_hash'], 'keyword_id': kw_id}],
+                                       ['md5_hash', 'keyword_id']))
+
+
+def _reset() -> None:
+    with get_engine().begin() as conn:
+        conn.execute(delete(file_keywords_table))
+        conn.execute(delete(keywords_table))
+
+
+def _measure(label: str, fn, keywords: pd.DataFrame):
+    _reset()
+    start = time.perf_counter()
+    fn(keywords)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<28} {len(keywords) / elapsed:10.0f} rows/s  ({elapsed:.2f}s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--keywords-per-file', type=int, default=5)
+    parser.add_argument('--distinct', type=int, default=200)
+    args = parser.parse_args()
+
+    with scratch_database(args.url) as engine:
+        db = Database()
+        now = datetime.now()
+        hashes = [f'{i:032x}' for i in range(args.files)]
+        db.insert_scan_results([
+            ScanResult(md5_hash=h, file_name=f'C{i:05}.mp4', file_extension='.mp4', media_type='video',
+                       directory='/footage/benchmark', last_indexed_at=now)
+            for i, h in enumerate(hashes)
+        ])
+        rng = random.Random(0)
+        vocabulary = [f'keyword {i}' for i in range(args.distinct)]
+        keywords = pd.DataFrame(
+            [(h, k) for h in hashes
+             for k in rng.sample(vocabulary, min(args.keywords_per_file, len(vocabulary)))],
+            columns=['md5_hash', 'keyword'],
+        )
+        print(f'{engine.dialect.name}: {len(keywords)} keyword rows for {args.files} files, '
+              f'{args.distinct} distinct keywords')
+        _measure('legacy per-row loop', legacy_insert_keywords, keywords)
+        _measure('Database.insert_keywords', db.insert_keywords, keywords)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Record conversion microbenchmark: the former DataFrame round trip vs. _table_records.
+
+    python -m db.benchmark_records [--batches 1,200,5000] [--repeat 20]
+
+Times only the conversion of a write's input into upsert records, without a database:
+scan results for Files (the per-file scan path) and detail dicts for VideoDetails (the
+metadata import path), reported as microseconds per record for each batch size.
+"""
+import argparse
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from db.database import _table_records
+from db.models import files_table, video_details_table
+from scanner.scanner import ScanResult
+
+
+def legacy_df_to_records(df: pd.DataFrame, table) -> list[dict] | None:
+    """_df_to_records before the writes took plain records."""
+    table_cols = {c.name for c in table.columns}
+    available = [c for c in df.columns if c in table_cols]
+    if not available or 'md5_hash' not in available:
+        return None
+    subset = df[available].drop_duplicates(subset='md5_hash', keep='last')
+    subset = subset.where(pd.notna(subset), None)
+    return subset.to_dict(orient='records')
+
+
+def _scan_results(count: int) -> list[ScanResult]:
+    now = datetime.now()
+    return [ScanResult(md5_hash=f'{i:032x}', file_name=f'C{i:05}.mp4', file_extension='.mp4',
+                       media_type='video', directory='/footage/benchmark', last_indexed_at=now,
+                       size=1 << 30, mtime_ns=i, inode=i)
+            for i in range(count)]
+
+
+def _details(count: int) -> list[dict]:
+    return [{'md5_hash': f'{i:032x}', 'width': 3840, 'height': 2160, 'frame_rate': 25.0,
+             'video_codec': 'hevc', 'duration_tc': '00:00:42:00', 'description': f'clip {i}',
+             'recorded_at': '2024:01:31 12:00:00', 'shot': None, 'scene': '4', 'take': '2'}
+            for i in range(count)]
+
+
+def _per_record_us(fn, records: int, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat / records * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batches', default='1,200,5000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f'{"write":<14} {"batch":>6} {"DataFrame µs/rec":>17} {"records µs/rec":>15}')
+    for batch in (int(b) for b in args.batches.split(',')):
+        scan_results, details = _scan_results(batch), _details(batch)
+        cases = {
+            'Files': (
+                lambda: legacy_df_to_records(pd.DataFrame([r.model_dump() for r in scan_results]), files_table),
+                lambda: _table_records((r.model_dump() for r in scan_results), files_table),
+            ),
+            'VideoDetails': (
+                lambda: legacy_df_to_records(pd.DataFrame(details), video_details_table),
+                lambda: _table_records(details, video_details_table),
+            ),
+        }
+        for label, (legacy, records) in cases.items():
+            print(f'{label:<14} {batch:>6} {_per_record_us(legacy, batch, args.repeat):>17.2f} '
+                  f'{_per_record_us(records, batch, args.repeat):>15.2f}')
+
+
+if __name__ == '__main__':
+    main()
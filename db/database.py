@@ -1,21 +1,37 @@
+import base64
+import json
+import logging
+import re
+import time
 import uuid
+from collections import Counter
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from threading import Lock
+from typing import Callable, Iterable, Optional
 
 import pandas as pd
-from sqlalchemy import case, delete, func, select, update
+from sqlalchemy import (
+    Float, Text, and_, case, cast, column, delete, extract, func, literal, literal_column, or_,
+    select, table, text, true, tuple_, union_all, update,
+)
 
-from db.engine import get_engine, upsert, upsert_ignore
+from db.engine import bulk_upsert, get_engine, upsert, upsert_add, upsert_ignore
 from db.models import (
     clip_previews_table,
+    facet_values_table,
     file_details_table,
+    file_fingerprints_table,
     file_keywords_table,
     files_table,
     keywords_table,
     locations_table,
     photo_details_table,
+    search_index_document,
+    search_index_table,
     video_details_table,
 )
+from db.timestamps import parse_recorded_at
 from ffmpeg.ffmpeg import ClipPreview
 from scanner.scanner import ScanResult
 
@@ -24,70 +40,525 @@ def generate_identifier():
     return str(uuid.uuid4()).replace('-', '')
 
 
-def _df_to_records(df: pd.DataFrame, table) -> list[dict] | None:
-    """Filter DataFrame columns to those present in the table; require md5_hash."""
-    table_cols = {c.name for c in table.columns}
-    available = [c for c in df.columns if c in table_cols]
-    if not available or 'md5_hash' not in available:
-        return None
-    # Byte-identical files (e.g. macOS '._*' AppleDouble sidecars) share an MD5;
-    # Postgres rejects ON CONFLICT DO UPDATE when one statement hits a row twice.
-    subset = df[available].drop_duplicates(subset='md5_hash', keep='last')
-    subset = subset.where(pd.notna(subset), None)
-    return subset.to_dict(orient='records')
+def _table_records(records: Iterable[dict], table) -> list[dict]:
+    """Filter records to the columns present in the table; require md5_hash."""
+    by_hash = {}
+    for record in records:
+        record = _table_record(record, table)
+        if record.get('md5_hash') is not None:
+            # Byte-identical files (e.g. macOS '._*' AppleDouble sidecars) share an MD5;
+            # Postgres rejects ON CONFLICT DO UPDATE when one statement hits a row twice.
+            by_hash[record['md5_hash']] = record
+    return list(by_hash.values())
+
+
+def _aggregate_list(col):
+    """Aggregate col into a list within a query: ARRAY on Postgres, a JSON array on SQLite."""
+    if get_engine().dialect.name == 'postgresql':
+        return func.array_agg(col)
+    return func.json_group_array(col)
+
+
+def _parse_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return [v for v in value if v is not None]
+
+
+def _encode_cursor(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor: str, length: int) -> list:
+    """Raises ValueError for cursors not produced by _encode_cursor with a key of length
+    values (e.g. a date-ordered cursor passed to a relevance-ordered search)."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError(f'Invalid search cursor: {cursor}') from e
+    if not isinstance(key, list) or len(key) != length:
+        raise ValueError(f'Invalid search cursor: {cursor}')
+    return key
+
+
+def _after_cursor(key: list):
+    """Rows strictly after key in (recorded_at_ts DESC NULLS LAST, file_name, md5_hash) order."""
+    recorded_at_ts, file_name, md5_hash = key
+    si = search_index_table.c
+    same_recorded_at_after = or_(
+        si.file_name > file_name,
+        and_(si.file_name == file_name, si.md5_hash > md5_hash),
+    )
+    col = si.recorded_at_ts
+    if recorded_at_ts is None:
+        return and_(col.is_(None), same_recorded_at_after)
+    try:
+        recorded_at_ts = datetime.fromisoformat(recorded_at_ts)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid search cursor timestamp: {recorded_at_ts}') from e
+    return or_(col < recorded_at_ts, col.is_(None),
+               and_(col == recorded_at_ts, same_recorded_at_after))
+
+
+def _after_rank(rank, key: list):
+    """Rows strictly after key in (rank DESC, md5_hash) order."""
+    last_rank, md5_hash = key
+    return or_(rank < last_rank, and_(rank == last_rank, search_index_table.c.md5_hash > md5_hash))
+
+
+_DATE_ONLY = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _parse_date(value: str):
+    parsed = parse_recorded_at(value)
+    if parsed is None:
+        raise ValueError(f'Invalid date: {value}')
+    return parsed
+
+
+_RESULT_CACHE_TTL = 30.0
+_result_cache: dict[tuple, tuple[float, object]] = {}
+_result_cache_lock = Lock()
+
+
+def _cached_result(conn, stmt, fetch: Callable):
+    """fetch(conn.execute(stmt)), reused for _RESULT_CACHE_TTL seconds per statement and
+    parameters. For aggregates over search filters (totals, facet counts) that would
+    otherwise be recomputed on every page."""
+    compiled = stmt.compile(dialect=conn.dialect)
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    now = time.monotonic()
+    with _result_cache_lock:
+        cached = _result_cache.get(key)
+    if cached is not None and now - cached[0] < _RESULT_CACHE_TTL:
+        return cached[1]
+    result = fetch(conn.execute(stmt))
+    with _result_cache_lock:
+        if len(_result_cache) > 256:
+            _result_cache.clear()
+        _result_cache[key] = (now, result)
+    return result
+
+
+# Values returned per facet by _facet_counts, most frequent first.
+_FACET_COUNT_LIMIT = 50
+
+
+def _facet_counts_stmt(source, conditions: list):
+    """Per-facet value counts of the rows matching conditions, as (facet, value, count).
+
+    The matching rows are selected once into a CTE (materialized by Postgres since it is
+    referenced repeatedly) that every facet's GROUP BY then reads, so the search index
+    is scanned a single time however many facets there are.
+    """
+    si = search_index_table.c
+    filtered = (
+        select(si.media_type, si.country, si.camera_make, si.camera_model, si.video_codec,
+               extract('year', si.recorded_at_ts).label('year'), si.keywords)
+        .select_from(source)
+        .where(*conditions)
+        .cte('filtered')
+    )
+    branches = [
+        select(literal(field).label('facet'), cast(filtered.c[field], Text).label('value'),
+               func.count().label('count'))
+        .where(filtered.c[field].isnot(None))
+        .group_by(filtered.c[field])
+        for field in ('media_type', 'country', 'camera_make', 'camera_model', 'video_codec', 'year')
+    ]
+    if get_engine().dialect.name == 'postgresql':
+        keyword = func.unnest(filtered.c.keywords).table_valued('value').render_derived()
+    else:
+        keyword = func.json_each(filtered.c.keywords).table_valued('value')
+    branches.append(
+        select(literal('keyword').label('facet'), keyword.c.value, func.count().label('count'))
+        .select_from(filtered.join(keyword, true()))
+        .group_by(keyword.c.value)
+    )
+    return union_all(*branches)
+
+
+def _facet_counts(result) -> dict[str, list[dict]]:
+    facets = {f: [] for f in ('media_type', 'country', 'camera_make', 'camera_model',
+                              'video_codec', 'keyword', 'year')}
+    for facet, value, count in result:
+        facets[facet].append({'value': value, 'count': count})
+    for values in facets.values():
+        values.sort(key=lambda v: (-v['count'], v['value']))
+        del values[_FACET_COUNT_LIMIT:]
+    return facets
+
+
+# Writes with at least this many rows go through db.engine.bulk_upsert (COPY on Postgres).
+_BULK_THRESHOLD = 1000
+
+
+def _chunks(items: list, size: int = 5000):
+    """Split multi-row statements so they stay below SQLite's bound-parameter limit."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _write_records(conn, table, records: list[dict], conflict_cols: list[str], staging_name: str) -> None:
+    """Small writes are one multi-row upsert; large imports (DaVinci exports) are streamed
+    through bulk_upsert instead."""
+    if len(records) >= _BULK_THRESHOLD:
+        bulk_upsert(conn, table, records, conflict_cols, staging_name=staging_name)
+    else:
+        conn.execute(upsert(table, records, conflict_cols))
+
+
+def _insert_keyword_links(conn, keywords: pd.DataFrame) -> list[str]:
+    """Link files to keywords (md5_hash, keyword rows), creating missing keywords; returns
+    the linked md5_hashes."""
+    links = keywords[['md5_hash', 'keyword']].drop_duplicates()
+    if links.empty:
+        return []
+    distinct_keywords = sorted(links['keyword'].unique())
+    for chunk in _chunks([{'keyword': k} for k in distinct_keywords]):
+        conn.execute(upsert_ignore(keywords_table, chunk, ['keyword']))
+    keyword_ids = {}
+    for chunk in _chunks(distinct_keywords):
+        rows = conn.execute(
+            select(keywords_table.c.keyword, keywords_table.c.id)
+            .where(keywords_table.c.keyword.in_(chunk))
+        ).fetchall()
+        keyword_ids.update({row.keyword: row.id for row in rows})
+    records = [
+        {'md5_hash': md5_hash, 'keyword_id': keyword_ids[keyword]}
+        for md5_hash, keyword in links.itertuples(index=False, name=None)
+    ]
+    for chunk in _chunks(records):
+        conn.execute(upsert_ignore(file_keywords_table, chunk, ['md5_hash', 'keyword_id']))
+    return list(links['md5_hash'])
+
+
+def _table_record(record: dict, table) -> dict:
+    return {k: v for k, v in record.items() if k in table.columns}
+
+
+def _with_recorded_at_ts(record: dict) -> dict:
+    """FileDetails record with recorded_at_ts normalized from recorded_at, which holds
+    whatever format the source wrote (ffprobe, exiftool, DaVinci)."""
+    if 'recorded_at' in record and 'recorded_at_ts' not in record:
+        return {**record, 'recorded_at_ts': parse_recorded_at(record['recorded_at'])}
+    return record
+
+
+def _search_index_source():
+    """The SearchIndex rows as derived from the normalized tables."""
+    keywords = (
+        select(_aggregate_list(keywords_table.c.keyword))
+        .select_from(file_keywords_table.join(
+            keywords_table, keywords_table.c.id == file_keywords_table.c.keyword_id))
+        .where(file_keywords_table.c.md5_hash == files_table.c.md5_hash)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            files_table.c.md5_hash, files_table.c.file_name,
+            files_table.c.directory, files_table.c.media_type,
+            file_details_table.c.recorded_at, file_details_table.c.recorded_at_ts,
+            locations_table.c.country, locations_table.c.city,
+            photo_details_table.c.camera_make, photo_details_table.c.camera_model,
+            video_details_table.c.video_codec,
+            file_details_table.c.description,
+            keywords.label('keywords'),
+        )
+        .select_from(
+            files_table
+            .outerjoin(file_details_table,
+                       files_table.c.md5_hash == file_details_table.c.md5_hash)
+            .outerjoin(locations_table,
+                       file_details_table.c.location_id == locations_table.c.id)
+            .outerjoin(video_details_table,
+                       files_table.c.md5_hash == video_details_table.c.md5_hash)
+            .outerjoin(photo_details_table,
+                       files_table.c.md5_hash == photo_details_table.c.md5_hash)
+        )
+    )
+
+
+def _search_text(file_name: str | None, description: str | None, keywords: list[str]) -> str:
+    """Free-text document of a file. The name is also added split into words, since
+    camera file names ('A001_C002_beach-day.MOV') are not tokenized at '_' or '-'."""
+    stem = (file_name or '').rsplit('.', 1)[0]
+    parts = [file_name, re.sub(r'[\W_]+', ' ', stem).strip(), description, *keywords]
+    return ' '.join(p for p in parts if p)
+
+
+# SQLite counterpart of the Postgres full-text index on SearchIndex (see
+# models.search_index_document); kept in sync by _refresh_search_index.
+_fts_table = table('SearchIndexFts', column('md5_hash'), column('search_text'))
+
+
+def _create_fts(conn) -> None:
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'SearchIndexFts'"
+    )).scalar()
+    if not exists:
+        conn.execute(text(
+            'CREATE VIRTUAL TABLE "SearchIndexFts" USING fts5('
+            "md5_hash UNINDEXED, search_text, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+        conn.execute(text(
+            'INSERT INTO "SearchIndexFts" (md5_hash, search_text) '
+            'SELECT md5_hash, search_text FROM "SearchIndex" WHERE search_text IS NOT NULL'
+        ))
+
+
+def _fts5_query(value: str) -> str:
+    """FTS5 MATCH expression requiring every word of value as a prefix."""
+    return ' '.join(f'"{w}"*' for w in re.findall(r'\w+', value))
+
+
+# SearchIndex columns offered as autocompleted facets (see FacetValues).
+_FACET_FIELDS = ('country', 'camera_make', 'camera_model', 'video_codec')
+
+
+def _update_facet_values(conn, old_rows, new_records: list[dict]) -> None:
+    """Adjust FacetValues usage counts for SearchIndex rows changing from old_rows to
+    new_records; values no longer used by any row are removed."""
+    deltas = Counter()
+    for row in old_rows:
+        for field in _FACET_FIELDS:
+            if row[field] is not None:
+                deltas[field, row[field]] -= 1
+    for record in new_records:
+        for field in _FACET_FIELDS:
+            if record[field] is not None:
+                deltas[field, record[field]] += 1
+    changed = sorted(key for key, delta in deltas.items() if delta)
+    if not changed:
+        return
+    records = [{'field': field, 'value': value, 'usage_count': deltas[field, value]}
+               for field, value in changed]
+    for chunk in _chunks(records, 2000):
+        conn.execute(upsert_add(facet_values_table, chunk, ['field', 'value'], 'usage_count'))
+    decreased = [key for key in changed if deltas[key] < 0]
+    for chunk in _chunks(decreased, 2000):
+        conn.execute(
+            delete(facet_values_table)
+            .where(tuple_(facet_values_table.c.field, facet_values_table.c.value).in_(chunk),
+                   facet_values_table.c.usage_count <= 0)
+        )
+
+
+def _refresh_search_index(conn, md5_hashes: Iterable[str]) -> None:
+    """Re-derive the SearchIndex rows of md5_hashes from the normalized tables.
+
+    Every write path calls this inside its own transaction, so the index commits (or
+    rolls back) together with the rows it was derived from. Hashes without a Files row
+    are skipped; their details are picked up once the file itself is inserted. The
+    FacetValues counts are adjusted by the difference between the old and new rows.
+    """
+    source = _search_index_source()
+    # Sorted so concurrent refreshes lock rows in the same order.
+    for chunk in _chunks(sorted(set(md5_hashes)), 2000):
+        # Locked, so a concurrent refresh of the same files cannot count the same change twice.
+        old_rows = conn.execute(
+            select(search_index_table.c.md5_hash,
+                   *[search_index_table.c[field] for field in _FACET_FIELDS])
+            .where(search_index_table.c.md5_hash.in_(chunk))
+            .order_by(search_index_table.c.md5_hash)
+            .with_for_update()
+        ).mappings().fetchall()
+        rows = conn.execute(source.where(files_table.c.md5_hash.in_(chunk))).fetchall()
+        records = []
+        for row in rows:
+            record = row._asdict()
+            record['keywords'] = sorted(_parse_list(row.keywords))
+            record['search_text'] = _search_text(row.file_name, record.pop('description'),
+                                                 record['keywords'])
+            records.append(record)
+        if not records:
+            continue
+        conn.execute(upsert(search_index_table, records, ['md5_hash']))
+        _update_facet_values(conn, old_rows, records)
+        if conn.dialect.name == 'sqlite':
+            hashes = [r['md5_hash'] for r in records]
+            conn.execute(_fts_table.delete().where(_fts_table.c.md5_hash.in_(hashes)))
+            conn.execute(_fts_table.insert(), [
+                {'md5_hash': r['md5_hash'], 'search_text': r['search_text']} for r in records
+            ])
+
+
+class DetailsBatcher:
+    """Write-behind buffer for FileDetails / VideoDetails / PhotoDetails rows.
+
+    Worker threads add one row per probed file; rows are upserted in multi-row statements,
+    one transaction per flush, once max_rows are pending or max_delay seconds have passed
+    since the last flush. A later row for the same md5_hash replaces a pending one (which
+    also keeps Postgres from hitting the same row twice in one ON CONFLICT statement).
+    Writes are serialised, and rows whose write fails stay pending; flush() waits for
+    writes in flight and raises if the rows can't be written, so callers only mark files
+    as probed once it returns. Use as a context manager so the remainder is flushed on exit.
+    """
+
+    def __init__(self, max_rows: int = 500, max_delay: float = 2.0):
+        self._max_rows = max_rows
+        self._max_delay = max_delay
+        self._lock = Lock()
+        self._write_lock = Lock()
+        self._pending = self._empty()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> 'DetailsBatcher':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def add_file_details(self, record: dict) -> None:
+        self._add(file_details_table, _with_recorded_at_ts(record))
+
+    def add_video_details(self, record: dict) -> None:
+        self._add(video_details_table, record)
+
+    def add_photo_details(self, record: dict) -> None:
+        self._add(photo_details_table, record)
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                batches = self._take()
+            self._write_or_restore(batches)
+
+    @staticmethod
+    def _empty() -> dict:
+        return {file_details_table: {}, video_details_table: {}, photo_details_table: {}}
+
+    def _add(self, table, record: dict) -> None:
+        record = _table_record(record, table)
+        with self._lock:
+            self._pending[table][record['md5_hash']] = record
+            due = (sum(len(rows) for rows in self._pending.values()) >= self._max_rows
+                   or time.monotonic() - self._last_flush >= self._max_delay)
+        if not due:
+            return
+        with self._write_lock:
+            with self._lock:
+                batches = self._take()
+            try:
+                self._write_or_restore(batches)
+            except Exception:
+                # The rows stay pending; flush() retries them and raises if they still fail.
+                logging.exception('Writing details failed, retrying with the next flush')
+
+    def _take(self) -> dict:
+        batches, self._pending = self._pending, self._empty()
+        self._last_flush = time.monotonic()
+        return batches
+
+    def _write_or_restore(self, batches: dict) -> None:
+        try:
+            self._write(batches)
+        except Exception:
+            with self._lock:
+                for table, rows in batches.items():
+                    # Rows added since the batch was taken are newer than the failed ones.
+                    self._pending[table] = {**rows, **self._pending[table]}
+            raise
+
+    @staticmethod
+    def _write(batches: dict) -> None:
+        if not any(batches.values()):
+            return
+        with get_engine().begin() as conn:
+            for table, rows in batches.items():
+                # A multi-row VALUES clause needs identical keys in every row.
+                by_columns: dict[tuple, list[dict]] = {}
+                for record in rows.values():
+                    by_columns.setdefault(tuple(record), []).append(record)
+                for records in by_columns.values():
+                    conn.execute(upsert(table, records, ['md5_hash']))
+            _refresh_search_index(conn, {h for rows in batches.values() for h in rows})
 
 
 class Database:
+    def prepare_full_text_search(self) -> None:
+        """Create and fill the SQLite FTS5 table if it is missing; run once at startup.
+        Postgres gets its full-text index from migration 0007."""
+        if get_engine().dialect.name == 'sqlite':
+            with get_engine().begin() as conn:
+                _create_fts(conn)
+
     # ------------------------------------------------------------------
     # Insert / upsert
     # ------------------------------------------------------------------
 
     def insert_scan_results(self, scan_results: list[ScanResult],
                             identifier: str = generate_identifier()) -> None:
-        df = pd.DataFrame([r.model_dump() for r in scan_results])
-        records = _df_to_records(df, files_table)
+        records = _table_records((r.model_dump() for r in scan_results), files_table)
         if records:
-            with get_engine().begin() as conn:
-                conn.execute(upsert(files_table, records, ['md5_hash']))
+            self._upsert_records(files_table, records, ['md5_hash'], identifier, indexed=True)
 
-    def insert_file_details(self, details: pd.DataFrame,
+    def insert_fingerprints(self, scan_results: list[ScanResult],
                             identifier: str = generate_identifier()) -> None:
-        records = _df_to_records(details, file_details_table)
+        records = [
+            {'directory': r.directory, 'file_name': r.file_name, 'size': r.size,
+             'mtime_ns': r.mtime_ns, 'inode': r.inode, 'sample_hash': r.sample_hash,
+             'md5_hash': r.md5_hash}
+            for r in scan_results if r.size is not None
+        ]
         if records:
-            with get_engine().begin() as conn:
-                conn.execute(upsert(file_details_table, records, ['md5_hash']))
+            self._upsert_records(file_fingerprints_table, records, ['directory', 'file_name'], identifier,
+                                 indexed=False)
 
-    def insert_video_details(self, details: pd.DataFrame,
+    def insert_file_details(self, details: list[dict],
+                            identifier: str = generate_identifier()) -> None:
+        records = _table_records((_with_recorded_at_ts(d) for d in details), file_details_table)
+        if records:
+            self._upsert_records(file_details_table, records, ['md5_hash'], identifier, indexed=True)
+
+    def insert_video_details(self, details: list[dict],
                              identifier: str = generate_identifier()) -> None:
-        records = _df_to_records(details, video_details_table)
+        records = _table_records(details, video_details_table)
         if records:
-            with get_engine().begin() as conn:
-                conn.execute(upsert(video_details_table, records, ['md5_hash']))
+            self._upsert_records(video_details_table, records, ['md5_hash'], identifier, indexed=True)
 
-    def insert_photo_details(self, details: pd.DataFrame,
+    def insert_photo_details(self, details: list[dict],
                              identifier: str = generate_identifier()) -> None:
-        records = _df_to_records(details, photo_details_table)
+        records = _table_records(details, photo_details_table)
         if records:
-            with get_engine().begin() as conn:
-                conn.execute(upsert(photo_details_table, records, ['md5_hash']))
+            self._upsert_records(photo_details_table, records, ['md5_hash'], identifier, indexed=True)
+
+    def import_metadata(self, scan_results: list[ScanResult], details: list[dict], keywords: pd.DataFrame,
+                        identifier: str = generate_identifier()) -> None:
+        """Files, FileDetails, VideoDetails and keywords of a metadata import in one transaction,
+        refreshing the SearchIndex once for all of them."""
+        writes = [
+            (files_table, _table_records((r.model_dump() for r in scan_results), files_table)),
+            (file_details_table, _table_records((_with_recorded_at_ts(d) for d in details),
+                                                file_details_table)),
+            (video_details_table, _table_records(details, video_details_table)),
+        ]
+        with get_engine().begin() as conn:
+            for table, records in writes:
+                if records:
+                    _write_records(conn, table, records, ['md5_hash'], f'{identifier}_{table.name}')
+            _insert_keyword_links(conn, keywords)
+            _refresh_search_index(conn, (r['md5_hash'] for r in writes[0][1]))
+
+    @staticmethod
+    def _upsert_records(table, records: list[dict], conflict_cols: list[str], identifier: str,
+                        indexed: bool) -> None:
+        """With indexed, the SearchIndex rows of the written md5_hashes are refreshed in the
+        same transaction."""
+        with get_engine().begin() as conn:
+            _write_records(conn, table, records, conflict_cols, identifier)
+            if indexed:
+                _refresh_search_index(conn, (r['md5_hash'] for r in records))
+
+    def details_batcher(self, max_rows: int = 500, max_delay: float = 2.0) -> DetailsBatcher:
+        return DetailsBatcher(max_rows=max_rows, max_delay=max_delay)
 
     def insert_keywords(self, keywords: pd.DataFrame,
                         identifier: str = generate_identifier()) -> None:
         with get_engine().begin() as conn:
-            for _, row in keywords[['md5_hash', 'keyword']].iterrows():
-                conn.execute(
-                    upsert_ignore(keywords_table, [{'keyword': row['keyword']}], ['keyword'])
-                )
-                kw_id = conn.execute(
-                    select(keywords_table.c.id).where(keywords_table.c.keyword == row['keyword'])
-                ).scalar()
-                conn.execute(
-                    upsert_ignore(
-                        file_keywords_table,
-                        [{'md5_hash': row['md5_hash'], 'keyword_id': kw_id}],
-                        ['md5_hash', 'keyword_id'],
-                    )
-                )
+            _refresh_search_index(conn, _insert_keyword_links(conn, keywords))
 
     def insert_raw_preview(self, md5_hash: str, data: bytes,
                            identifier: str = generate_identifier()) -> None:
@@ -114,6 +585,43 @@ class Database:
             rows = conn.execute(stmt).fetchall()
         return {row[0]: {'md5_hash': row[1], 'media_type': row[2]} for row in rows}
 
+    def get_fingerprints(self, directory: str) -> dict[str, dict]:
+        """Last known fingerprint of every file at or below directory, keyed by path."""
+        stmt = (
+            select(file_fingerprints_table)
+            .where((file_fingerprints_table.c.directory == directory)
+                   | file_fingerprints_table.c.directory.startswith(directory.rstrip('/') + '/',
+                                                                    autoescape=True))
+        )
+        with get_engine().connect() as conn:
+            rows = conn.execute(stmt).fetchall()
+        return {str(Path(row.directory) / row.file_name): row._asdict() for row in rows}
+
+    def get_fingerprints_for_paths(self, paths: list[str]) -> dict[str, dict]:
+        if not paths:
+            return {}
+        keys = [(str(Path(p).parent), Path(p).name) for p in paths]
+        rows = []
+        with get_engine().connect() as conn:
+            for chunk in _chunks(keys, 2000):
+                stmt = (
+                    select(file_fingerprints_table)
+                    .where(tuple_(file_fingerprints_table.c.directory,
+                                  file_fingerprints_table.c.file_name).in_(chunk))
+                )
+                rows += conn.execute(stmt).fetchall()
+        return {str(Path(row.directory) / row.file_name): row._asdict() for row in rows}
+
+    def find_md5_by_sample_hash(self, size: int, sample_hash: str) -> Optional[str]:
+        stmt = (
+            select(file_fingerprints_table.c.md5_hash)
+            .where(file_fingerprints_table.c.size == size,
+                   file_fingerprints_table.c.sample_hash == sample_hash)
+            .limit(1)
+        )
+        with get_engine().connect() as conn:
+            return conn.execute(stmt).scalar()
+
     def get_file_by_hash(self, md5_hash: str) -> Optional[dict]:
         stmt = select(files_table).where(files_table.c.md5_hash == md5_hash)
         with get_engine().connect() as conn:
@@ -131,16 +639,28 @@ class Database:
             row = conn.execute(stmt).fetchone()
         return row._asdict() if row is not None else None
 
+    _VIDEO_DETAIL_COLS = [
+        video_details_table.c.width, video_details_table.c.height,
+        video_details_table.c.frame_rate, video_details_table.c.frame_rate_verbose,
+        video_details_table.c.video_codec, video_details_table.c.bit_depth,
+        video_details_table.c.audio_codec, video_details_table.c.audio_bit_depth,
+        video_details_table.c.audio_sample_rate, video_details_table.c.audio_channels,
+        video_details_table.c.duration_tc,
+    ]
+
+    _PHOTO_DETAIL_COLS = [
+        photo_details_table.c.width, photo_details_table.c.height,
+        photo_details_table.c.camera_make, photo_details_table.c.camera_model,
+        photo_details_table.c.iso, photo_details_table.c.aperture,
+        photo_details_table.c.shutter_speed, photo_details_table.c.focal_length,
+        photo_details_table.c.color_space, photo_details_table.c.bit_depth,
+        photo_details_table.c.lens, photo_details_table.c.focal_length_35mm,
+        photo_details_table.c.scale_factor_35mm, photo_details_table.c.field_of_view,
+    ]
+
     def get_video_details(self, md5_hash: str) -> Optional[dict]:
         stmt = (
-            select(
-                video_details_table.c.width, video_details_table.c.height,
-                video_details_table.c.frame_rate, video_details_table.c.frame_rate_verbose,
-                video_details_table.c.video_codec, video_details_table.c.bit_depth,
-                video_details_table.c.audio_codec, video_details_table.c.audio_bit_depth,
-                video_details_table.c.audio_sample_rate, video_details_table.c.audio_channels,
-                video_details_table.c.duration_tc,
-            )
+            select(*self._VIDEO_DETAIL_COLS)
             .where(video_details_table.c.md5_hash == md5_hash)
         )
         with get_engine().connect() as conn:
@@ -149,29 +669,102 @@ class Database:
 
     def get_photo_details(self, md5_hash: str) -> Optional[dict]:
         stmt = (
-            select(
-                photo_details_table.c.width, photo_details_table.c.height,
-                photo_details_table.c.camera_make, photo_details_table.c.camera_model,
-                photo_details_table.c.iso, photo_details_table.c.aperture,
-                photo_details_table.c.shutter_speed, photo_details_table.c.focal_length,
-                photo_details_table.c.color_space, photo_details_table.c.bit_depth,
-                photo_details_table.c.lens, photo_details_table.c.focal_length_35mm,
-                photo_details_table.c.scale_factor_35mm, photo_details_table.c.field_of_view,
-            )
+            select(*self._PHOTO_DETAIL_COLS)
             .where(photo_details_table.c.md5_hash == md5_hash)
         )
         with get_engine().connect() as conn:
             row = conn.execute(stmt).fetchone()
         return row._asdict() if row is not None else None
 
-    def rename_file(self, md5_hash: str, new_file_name: str) -> None:
+    def get_file_info_by_path(self, file_path: str) -> Optional[dict]:
+        """Tracked file with its details, location, GPS and keywords in one round trip.
+
+        Returns {'file', 'video_details', 'photo_details', 'location', 'gps', 'keywords'};
+        the nested dicts are None when the corresponding row does not exist.
+        """
+        p = Path(file_path)
+        keywords = (
+            select(_aggregate_list(keywords_table.c.keyword))
+            .select_from(file_keywords_table.join(
+                keywords_table, keywords_table.c.id == file_keywords_table.c.keyword_id))
+            .where(file_keywords_table.c.md5_hash == files_table.c.md5_hash)
+            .scalar_subquery()
+        )
         stmt = (
-            update(files_table)
-            .where(files_table.c.md5_hash == md5_hash)
-            .values(file_name=new_file_name)
+            select(
+                *[c.label(f'file__{c.name}') for c in files_table.c],
+                video_details_table.c.md5_hash.label('video__md5_hash'),
+                *[c.label(f'video__{c.name}') for c in self._VIDEO_DETAIL_COLS],
+                photo_details_table.c.md5_hash.label('photo__md5_hash'),
+                *[c.label(f'photo__{c.name}') for c in self._PHOTO_DETAIL_COLS],
+                *[c.label(f'location__{c.name}') for c in locations_table.c],
+                file_details_table.c.latitude.label('gps__latitude'),
+                file_details_table.c.longitude.label('gps__longitude'),
+                file_details_table.c.altitude.label('gps__altitude'),
+                keywords.label('keywords'),
+            )
+            .select_from(
+                files_table
+                .outerjoin(file_details_table,
+                           files_table.c.md5_hash == file_details_table.c.md5_hash)
+                .outerjoin(locations_table,
+                           file_details_table.c.location_id == locations_table.c.id)
+                .outerjoin(video_details_table,
+                           files_table.c.md5_hash == video_details_table.c.md5_hash)
+                .outerjoin(photo_details_table,
+                           files_table.c.md5_hash == photo_details_table.c.md5_hash)
+            )
+            .where(files_table.c.directory == str(p.parent),
+                   files_table.c.file_name == p.name)
         )
+        with get_engine().connect() as conn:
+            row = conn.execute(stmt).fetchone()
+        if row is None:
+            return None
+
+        groups: dict[str, dict] = {}
+        for key, value in row._asdict().items():
+            group, sep, column = key.partition('__')
+            if sep:
+                groups.setdefault(group, {})[column] = value
+        video = groups['video']
+        photo = groups['photo']
+        gps = groups['gps']
+        return {
+            'file': groups['file'],
+            'video_details': ({k: v for k, v in video.items() if k != 'md5_hash'}
+                              if video['md5_hash'] is not None else None),
+            'photo_details': ({k: v for k, v in photo.items() if k != 'md5_hash'}
+                              if photo['md5_hash'] is not None else None),
+            'location': groups['location'] if groups['location']['id'] is not None else None,
+            'gps': ((gps['latitude'], gps['longitude'], gps['altitude'])
+                    if gps['latitude'] is not None and gps['longitude'] is not None else None),
+            'keywords': sorted(_parse_list(row.keywords)),
+        }
+
+    def rename_file(self, md5_hash: str, new_file_name: str) -> None:
+        """Rename the file in Files and move its fingerprint to the new path, so the next scan
+        still recognises it as unchanged."""
+        fp = file_fingerprints_table.c
         with get_engine().begin() as conn:
-            conn.execute(stmt)
+            old = conn.execute(
+                select(files_table.c.directory, files_table.c.file_name)
+                .where(files_table.c.md5_hash == md5_hash)
+            ).fetchone()
+            conn.execute(
+                update(files_table)
+                .where(files_table.c.md5_hash == md5_hash)
+                .values(file_name=new_file_name)
+            )
+            if old is not None and old.file_name != new_file_name:
+                conn.execute(delete(file_fingerprints_table)
+                             .where(fp.directory == old.directory, fp.file_name == new_file_name))
+                conn.execute(
+                    update(file_fingerprints_table)
+                    .where(fp.directory == old.directory, fp.file_name == old.file_name)
+                    .values(file_name=new_file_name)
+                )
+            _refresh_search_index(conn, [md5_hash])
 
     def get_keywords(self, md5_hash: str) -> list[str]:
         stmt = (
@@ -197,6 +790,7 @@ class Database:
                     ['md5_hash', 'keyword_id'],
                 )
             )
+            _refresh_search_index(conn, [md5_hash])
 
     def delete_keyword(self, md5_hash: str, keyword: str) -> None:
         kw_subq = (
@@ -211,6 +805,7 @@ class Database:
         )
         with get_engine().begin() as conn:
             conn.execute(stmt)
+            _refresh_search_index(conn, [md5_hash])
 
     def get_file_gps(self, md5_hash: str) -> tuple[float, float, float | None] | None:
         stmt = (
@@ -295,102 +890,134 @@ class Database:
             for row in rows
         ]
 
-    _FACET_COLS = {
-        'camera_make':  photo_details_table.c.camera_make,
-        'camera_model': photo_details_table.c.camera_model,
-        'video_codec':  video_details_table.c.video_codec,
-    }
-
     def get_facet_values(self, field: str, q: str, limit: int) -> list[str]:
-        if field == 'country':
-            col = locations_table.c.country
-            stmt = (
-                select(col.distinct())
-                .join(file_details_table,
-                      locations_table.c.id == file_details_table.c.location_id)
-                .where(col.isnot(None), col.ilike(f'%{q}%'))
-                .order_by(col)
-                .limit(limit)
-            )
-        elif field in self._FACET_COLS:
-            col = self._FACET_COLS[field]
-            stmt = (
-                select(col.distinct())
-                .where(col.isnot(None), col.ilike(f'%{q}%'))
-                .order_by(col)
-                .limit(limit)
-            )
-        else:
+        """Autocomplete for a search facet from the FacetValues dictionary: values
+        starting with q first, then other values containing q, each most-used first."""
+        if field not in _FACET_FIELDS:
             return []
+        fv = facet_values_table.c
+        stmt = select(fv.value).where(fv.field == field)
+        if q:
+            stmt = stmt.where(fv.value.icontains(q, autoescape=True)).order_by(
+                fv.value.istartswith(q, autoescape=True).desc())
+        stmt = stmt.order_by(fv.usage_count.desc(), fv.value).limit(limit)
         with get_engine().connect() as conn:
             return [r[0] for r in conn.execute(stmt).fetchall()]
 
-    def search_files(self, query: dict) -> tuple[int, list[dict]]:
+    def search_files(self, query: dict) -> tuple[int | None, list[dict], str | None, dict | None]:
+        """One page of (total, rows, next_cursor, facets) from SearchIndex, keyset-paginated by
+        cursor. Raises ValueError for an invalid cursor or date, or search text without words."""
+        si = search_index_table.c
+        source = search_index_table
         conditions = []
+        rank = None
+
+        search_text = (query.get('text') or '').strip()
+        if search_text:
+            # Both backends search by words; without any, FTS5 has nothing to match.
+            if not re.search(r'\w', search_text):
+                raise ValueError(f'Search text has no words: {search_text}')
+            if get_engine().dialect.name == 'postgresql':
+                ts_query = func.websearch_to_tsquery(text("'simple'"), search_text)
+                conditions.append(or_(
+                    search_index_document.op('@@')(ts_query),
+                    si.file_name.op('%')(search_text),
+                    si.file_name.icontains(search_text, autoescape=True),
+                ))
+                rank = cast(func.ts_rank(search_index_document, ts_query)
+                            + func.similarity(si.file_name, search_text), Float)
+            else:
+                fts = literal_column('"SearchIndexFts"')
+                matches = (
+                    select(_fts_table.c.md5_hash, (-func.bm25(fts)).label('rank'))
+                    .where(fts.op('MATCH')(_fts5_query(search_text)))
+                    .subquery()
+                )
+                source = search_index_table.join(matches, matches.c.md5_hash == si.md5_hash)
+                rank = matches.c.rank
 
         if query.get('media_types'):
-            conditions.append(files_table.c.media_type.in_(query['media_types']))
+            conditions.append(si.media_type.in_(query['media_types']))
 
         if query.get('keywords'):
-            kw_subq = (
-                select(file_keywords_table.c.md5_hash)
-                .join(keywords_table,
-                      file_keywords_table.c.keyword_id == keywords_table.c.id)
-                .where(keywords_table.c.keyword.in_(query['keywords']))
-            )
-            conditions.append(files_table.c.md5_hash.in_(kw_subq))
+            if get_engine().dialect.name == 'postgresql':
+                conditions.append(si.keywords.overlap(query['keywords']))
+            else:
+                kw_subq = (
+                    select(file_keywords_table.c.md5_hash)
+                    .join(keywords_table,
+                          file_keywords_table.c.keyword_id == keywords_table.c.id)
+                    .where(keywords_table.c.keyword.in_(query['keywords']))
+                )
+                conditions.append(si.md5_hash.in_(kw_subq))
 
         if query.get('country'):
-            conditions.append(locations_table.c.country == query['country'])
+            conditions.append(si.country == query['country'])
         if query.get('date_from'):
-            conditions.append(file_details_table.c.recorded_at >= query['date_from'])
+            conditions.append(si.recorded_at_ts >= _parse_date(query['date_from']))
         if query.get('date_to'):
-            conditions.append(file_details_table.c.recorded_at <= query['date_to'])
+            if _DATE_ONLY.match(query['date_to'].strip()):
+                # A bare date includes that whole day.
+                conditions.append(si.recorded_at_ts < _parse_date(query['date_to']) + timedelta(days=1))
+            else:
+                conditions.append(si.recorded_at_ts <= _parse_date(query['date_to']))
         if query.get('camera_make'):
-            conditions.append(photo_details_table.c.camera_make == query['camera_make'])
+            conditions.append(si.camera_make == query['camera_make'])
         if query.get('camera_model'):
-            conditions.append(photo_details_table.c.camera_model == query['camera_model'])
+            conditions.append(si.camera_model == query['camera_model'])
         if query.get('video_codec'):
-            conditions.append(video_details_table.c.video_codec == query['video_codec'])
+            conditions.append(si.video_codec == query['video_codec'])
 
-        base_from = (
-            files_table
-            .outerjoin(file_details_table,
-                       files_table.c.md5_hash == file_details_table.c.md5_hash)
-            .outerjoin(locations_table,
-                       file_details_table.c.location_id == locations_table.c.id)
-            .outerjoin(video_details_table,
-                       files_table.c.md5_hash == video_details_table.c.md5_hash)
-            .outerjoin(photo_details_table,
-                       files_table.c.md5_hash == photo_details_table.c.md5_hash)
-        )
-
-        count_stmt = select(func.count()).select_from(base_from)
-        data_stmt = (
-            select(
-                files_table.c.md5_hash, files_table.c.file_name,
-                files_table.c.directory, files_table.c.media_type,
-                file_details_table.c.recorded_at,
-                locations_table.c.country, locations_table.c.city,
+        page_size = query.get('page_size', 50)
+        columns = [si.md5_hash, si.file_name, si.directory, si.media_type,
+                   si.recorded_at, si.country, si.city]
+        if rank is None:
+            data_stmt = (
+                select(*columns, si.recorded_at_ts)
+                .order_by(si.recorded_at_ts.desc().nullslast(), si.file_name, si.md5_hash)
             )
-            .select_from(base_from)
-            .order_by(
-                file_details_table.c.recorded_at.desc().nullslast(),
-                files_table.c.file_name,
+        else:
+            data_stmt = (
+                select(*columns, rank.label('rank'))
+                .select_from(source)
+                .order_by(rank.desc(), si.md5_hash)
             )
-            .limit(query.get('page_size', 50))
-            .offset((query.get('page', 1) - 1) * query.get('page_size', 50))
-        )
-
+        data_stmt = data_stmt.limit(page_size)
         if conditions:
-            count_stmt = count_stmt.where(*conditions)
             data_stmt = data_stmt.where(*conditions)
+        if query.get('cursor'):
+            if rank is None:
+                data_stmt = data_stmt.where(_after_cursor(_decode_cursor(query['cursor'], 3)))
+            else:
+                data_stmt = data_stmt.where(_after_rank(rank, _decode_cursor(query['cursor'], 2)))
+        else:
+            data_stmt = data_stmt.offset((query.get('page', 1) - 1) * page_size)
 
         with get_engine().connect() as conn:
-            total = conn.execute(count_stmt).scalar()
-            rows = conn.execute(data_stmt).fetchall()
+            rows = [row._asdict() for row in conn.execute(data_stmt).fetchall()]
+            total = None
+            if query.get('include_total', True):
+                count_stmt = select(func.count()).select_from(source)
+                if conditions:
+                    count_stmt = count_stmt.where(*conditions)
+                total = _cached_result(conn, count_stmt, lambda result: result.scalar())
+            facets = None
+            if query.get('include_facets'):
+                facets = _cached_result(conn, _facet_counts_stmt(source, conditions), _facet_counts)
 
-        return total, [row._asdict() for row in rows]
+        next_cursor = None
+        if len(rows) == page_size:
+            last = rows[-1]
+            if rank is None:
+                recorded_at_ts = last['recorded_at_ts']
+                next_cursor = _encode_cursor([recorded_at_ts.isoformat() if recorded_at_ts else None,
+                                              last['file_name'], last['md5_hash']])
+            else:
+                next_cursor = _encode_cursor([last['rank'], last['md5_hash']])
+        for row in rows:
+            row.pop('rank', None)
+            row.pop('recorded_at_ts', None)
+        return total, rows, next_cursor, facets
 
     def get_all_keywords(self) -> list[str]:
         stmt = select(keywords_table.c.keyword).order_by(keywords_table.c.keyword)
@@ -434,6 +1061,7 @@ class Database:
                        [{'md5_hash': md5_hash, 'location_id': location_id}],
                        ['md5_hash'])
             )
+            _refresh_search_index(conn, [md5_hash])
 
     def get_clip_preview(self, md5_hash: str) -> bytes | None:
         stmt = (
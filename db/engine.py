@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+import csv
+import io
+
+from sqlalchemy import Integer, create_engine, text
 
 from env.environment import Environment
 
@@ -41,3 +44,59 @@ def upsert_ignore(table, records: list[dict], conflict_cols: list[str]):
     """INSERT … ON CONFLICT DO NOTHING."""
     return _make_insert(table).values(records).on_conflict_do_nothing(
         index_elements=conflict_cols)
+
+
+def upsert_add(table, records: list[dict], conflict_cols: list[str], counter_col: str):
+    """INSERT … ON CONFLICT DO UPDATE SET counter_col = counter_col + EXCLUDED.counter_col."""
+    stmt = _make_insert(table).values(records)
+    return stmt.on_conflict_do_update(
+        index_elements=conflict_cols,
+        set_={counter_col: table.c[counter_col] + getattr(stmt.excluded, counter_col)},
+    )
+
+
+def bulk_upsert(conn, table, records: list[dict], conflict_cols: list[str], staging_name: str):
+    """Bulk variant of upsert for large imports; same semantics, one set-based merge.
+
+    On Postgres the records are streamed with COPY into a temporary (hence unlogged)
+    staging table and merged into the target with a single INSERT … SELECT … ON CONFLICT.
+    Other dialects fall back to an executemany of the regular upsert. records must all
+    have the same keys and be unique on conflict_cols.
+    """
+    if get_engine().dialect.name != 'postgresql':
+        stmt = _make_insert(table)
+        update_cols = {k: getattr(stmt.excluded, k) for k in records[0] if k not in conflict_cols}
+        conn.execute(stmt.on_conflict_do_update(index_elements=conflict_cols, set_=update_cols), records)
+        return
+
+    quote = conn.dialect.identifier_preparer.quote
+    cols = list(records[0])
+    col_list = ', '.join(quote(c) for c in cols)
+    update_list = ', '.join(f'{quote(c)} = EXCLUDED.{quote(c)}' for c in cols if c not in conflict_cols)
+    staging = quote(f'_staging_{staging_name}')
+
+    # pandas turns integer columns containing NULLs into floats; COPY, unlike a bound
+    # INSERT parameter, does not cast '1080.0' into an integer column.
+    int_cols = {c.name for c in table.columns if isinstance(c.type, Integer)}
+
+    def csv_value(col, value):
+        if col in int_cols and isinstance(value, float):
+            return int(value)
+        return value
+
+    buffer = io.StringIO()
+    # QUOTE_NONNUMERIC writes None as an empty unquoted field, which COPY … CSV reads as
+    # NULL, while empty strings are quoted and stay empty strings.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerows([csv_value(c, record[c]) for c in cols] for record in records)
+    buffer.seek(0)
+
+    conn.execute(text(f'CREATE TEMPORARY TABLE {staging} (LIKE {quote(table.name)} INCLUDING DEFAULTS) '
+                      f'ON COMMIT DROP'))
+    with conn.connection.driver_connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {staging} ({col_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+    conflict = f'DO UPDATE SET {update_list}' if update_list else 'DO NOTHING'
+    conn.execute(text(
+        f'INSERT INTO {quote(table.name)} ({col_list}) SELECT {col_list} FROM {staging} '
+        f'ON CONFLICT ({", ".join(quote(c) for c in conflict_cols)}) {conflict}'
+    ))
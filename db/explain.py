@@ -0,0 +1,196 @@
+"""Query-plan check: runs every Database read (and, with --seed, every write) with sample
+arguments taken from the archive, EXPLAINs each statement it issues and reports sequential
+scans.
+
+    python -m db.explain [--allow get_map_points ...]
+    python -m db.explain --seed 100000 --url postgresql://.../scratch
+
+Postgres only. Run it against a copy of a real archive (or one with at least ~100k
+files): on small tables the planner prefers sequential scans whatever the indexes. With
+--seed N it instead fills the empty scratch database at --url with N synthetic files,
+ANALYZEs it, runs the read and write checks and drops the schema again. Write checks
+change data (keywords, locations, file names), so they only run on such a scratch database.
+Exits with status 1 when a check outside --allow scans a table sequentially.
+"""
+import argparse
+import sys
+from typing import Callable
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import event, select, text
+
+from db.database import Database
+from db.engine import get_engine
+from db.models import files_table, keywords_table, locations_table, search_index_table
+from db.scratch import scratch_database, synthetic_metadata
+
+# Reads that return (or aggregate over) whole tables by design.
+_FULL_SCANS = ['get_map_points', 'get_files_without_clip_preview', 'get_all_keywords',
+               'get_all_locations']
+
+
+def _sample() -> dict:
+    with get_engine().connect() as conn:
+        file = conn.execute(select(files_table).limit(1)).fetchone()
+        keyword = conn.execute(select(keywords_table.c.keyword).limit(1)).scalar()
+        country = conn.execute(
+            select(search_index_table.c.country)
+            .where(search_index_table.c.country.isnot(None)).limit(1)
+        ).scalar()
+        location_id = conn.execute(select(locations_table.c.id).limit(1)).scalar()
+    if file is None:
+        sys.exit('The database has no files to sample query arguments from.')
+    return {'md5_hash': file.md5_hash, 'directory': file.directory,
+            'path': f'{file.directory}/{file.file_name}', 'file_name': file.file_name,
+            'keyword': keyword or '', 'country': country or '', 'location_id': location_id}
+
+
+def _checks(s: dict) -> dict[str, Callable[[Database], object]]:
+    return {
+        'get_tracked_files_in_directory': lambda db: db.get_tracked_files_in_directory(s['directory']),
+        'get_fingerprints': lambda db: db.get_fingerprints(s['directory']),
+        'get_fingerprints_for_paths': lambda db: db.get_fingerprints_for_paths([s['path']]),
+        'find_md5_by_sample_hash': lambda db: db.find_md5_by_sample_hash(0, s['md5_hash']),
+        'get_file_by_hash': lambda db: db.get_file_by_hash(s['md5_hash']),
+        'get_file_by_path': lambda db: db.get_file_by_path(s['path']),
+        'get_video_details': lambda db: db.get_video_details(s['md5_hash']),
+        'get_photo_details': lambda db: db.get_photo_details(s['md5_hash']),
+        'get_file_info_by_path': lambda db: db.get_file_info_by_path(s['path']),
+        'get_keywords': lambda db: db.get_keywords(s['md5_hash']),
+        'get_file_gps': lambda db: db.get_file_gps(s['md5_hash']),
+        'get_location_for_file': lambda db: db.get_location_for_file(s['md5_hash']),
+        'get_clip_preview': lambda db: db.get_clip_preview(s['md5_hash']),
+        'get_facet_values': lambda db: db.get_facet_values('camera_make', 'a', 10),
+        'search_files': lambda db: db.search_files({'include_total': False}),
+        'search_files[keywords]': lambda db: db.search_files(
+            {'keywords': [s['keyword']], 'include_total': False}),
+        'search_files[country+facets]': lambda db: db.search_files(
+            {'country': s['country'], 'include_facets': True}),
+        'search_files[date]': lambda db: db.search_files(
+            {'date_from': '2024-01-01', 'date_to': '2024-01-31', 'include_total': False}),
+        'search_files[text]': lambda db: db.search_files(
+            {'text': s['file_name'], 'include_total': False}),
+        'get_map_points': lambda db: db.get_map_points(-180, -90, 180, 90, 3),
+        'get_all_keywords': lambda db: db.get_all_keywords(),
+        'get_all_locations': lambda db: db.get_all_locations(),
+        'get_files_without_clip_preview': lambda db: db.get_files_without_clip_preview(),
+    }
+
+
+def _write_checks(s: dict) -> dict[str, Callable[[Database], object]]:
+    """Writes, each including the SELECTs of its SearchIndex refresh. They overwrite the
+    sampled file's details, so only run them on a seeded scratch database; the keyword they
+    add is unlinked again by delete_keyword."""
+    record = {'md5_hash': s['md5_hash'], 'recorded_at': '2024:01:31 12:00:00', 'width': 3840}
+
+    def batcher_flush(db: Database):
+        with db.details_batcher() as batcher:
+            batcher.add_file_details(record)
+            batcher.add_video_details(record)
+
+    return {
+        'insert_file_details': lambda db: db.insert_file_details([record]),
+        'insert_video_details': lambda db: db.insert_video_details([record]),
+        'details_batcher.flush': batcher_flush,
+        'insert_keywords': lambda db: db.insert_keywords(
+            pd.DataFrame([(s['md5_hash'], 'explain keyword')], columns=['md5_hash', 'keyword'])),
+        'add_keyword': lambda db: db.add_keyword(s['md5_hash'], 'explain keyword'),
+        'delete_keyword': lambda db: db.delete_keyword(s['md5_hash'], 'explain keyword'),
+        'assign_location': lambda db: db.assign_location(s['md5_hash'], s['location_id']),
+        'rename_file': lambda db: db.rename_file(s['md5_hash'], s['file_name']),
+    }
+
+
+def _seed(db: Database, files: int) -> None:
+    scan_results, details, keywords = synthetic_metadata(files)
+    location_ids = [db.create_location(f'Location {i}', f'City {i}', None, f'Country {i % 5}',
+                                       45.0 + i, 7.0 + i)
+                    for i in range(20)]
+    for i, record in enumerate(details):
+        record.update(location_id=location_ids[i % len(location_ids)],
+                      latitude=45.0 + i % 1000 / 100, longitude=7.0 + i % 700 / 100)
+    db.import_metadata(scan_results, details, keywords)
+    db.insert_fingerprints([r.model_copy(update={'size': 1 << 30, 'mtime_ns': i, 'inode': i,
+                                                 'sample_hash': r.md5_hash})
+                            for i, r in enumerate(scan_results)])
+    with get_engine().begin() as conn:
+        conn.execute(text('ANALYZE'))
+
+
+def _capture(fn: Callable[[], object]) -> list[tuple[str, object]]:
+    """The (statement, parameters) of every query and write issued while running fn, except
+    executemany batches. EXPLAIN without ANALYZE only plans them, so writes aren't repeated."""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(
+                ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    engine = get_engine()
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+    return statements
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    scans = [plan['Relation Name']] if plan.get('Node Type') == 'Seq Scan' else []
+    for child in plan.get('Plans', []):
+        scans += _seq_scans(child)
+    return scans
+
+
+def _run_checks(checks: dict[str, Callable[[Database], object]], allow: list[str]) -> int:
+    """Print one line per check; returns the number of failures."""
+    db = Database()
+    failures = 0
+    for name, check in checks.items():
+        scans = set()
+        for statement, parameters in _capture(lambda: check(db)):
+            raw = get_engine().raw_connection()
+            try:
+                cursor = raw.cursor()
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {statement}', parameters)
+                scans.update(_seq_scans(cursor.fetchone()[0][0]['Plan']))
+            finally:
+                raw.close()
+        if not scans:
+            print(f'ok       {name}')
+        elif name in allow:
+            print(f'allowed  {name}: seq scan on {", ".join(sorted(scans))}')
+        else:
+            print(f'FAIL     {name}: seq scan on {", ".join(sorted(scans))}')
+            failures += 1
+    return failures
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--allow', nargs='*', default=_FULL_SCANS,
+                        help=f'checks allowed to scan sequentially (default: {" ".join(_FULL_SCANS)})')
+    parser.add_argument('--seed', type=int, metavar='N',
+                        help='seed the empty database at --url with N synthetic files and check that')
+    parser.add_argument('--url', help='scratch Postgres database for --seed')
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        if not args.url or not args.url.startswith('postgresql'):
+            sys.exit('--seed needs --url pointing at an empty scratch Postgres database.')
+        with scratch_database(args.url):
+            _seed(Database(), args.seed)
+            sample = _sample()
+            failures = _run_checks({**_checks(sample), **_write_checks(sample)}, args.allow)
+        sys.exit(1 if failures else 0)
+
+    if get_engine().dialect.name != 'postgresql':
+        sys.exit('EXPLAIN checks need a Postgres database.')
+    sys.exit(1 if _run_checks(_checks(_sample()), args.allow) else 0)
+
+
+if __name__ == '__main__':
+    main()
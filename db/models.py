@@ -1,8 +1,9 @@
 from sqlalchemy import (
-    Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary,
+    JSON, BigInteger, Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary,
     MetaData, String, Table, Text,
 )
-from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import func, text
 
 metadata = MetaData()
 
@@ -36,6 +37,9 @@ file_details_table = Table(
     Column('altitude', Float),
     Column('description', Text),
     Column('recorded_at', Text),
+    # recorded_at normalized to a naive local wall-clock timestamp (UTC values are converted
+    # to the server's time zone; see db.timestamps.parse_recorded_at).
+    Column('recorded_at_ts', DateTime),
     Column('last_modified_at', Text),
     Column('json', Text),
 )
@@ -105,9 +109,83 @@ clip_previews_table = Table(
     Column('data', LargeBinary),
 )
 
+file_fingerprints_table = Table(
+    'FileFingerprints', metadata,
+    Column('directory', Text, primary_key=True),
+    Column('file_name', Text, primary_key=True),
+    Column('size', BigInteger),
+    Column('mtime_ns', BigInteger),
+    Column('inode', BigInteger),
+    Column('sample_hash', String),
+    Column('md5_hash', String),
+)
+
+# Denormalized copy of the filterable columns of Files, FileDetails, Locations,
+# VideoDetails, PhotoDetails and FileKeywords, one row per file. Search and facet
+# queries read only this table; Database keeps it current on every write.
+search_index_table = Table(
+    'SearchIndex', metadata,
+    Column('md5_hash', String, primary_key=True),
+    Column('file_name', Text),
+    Column('directory', Text),
+    Column('media_type', Text),
+    Column('recorded_at', Text),
+    Column('recorded_at_ts', DateTime),
+    Column('country', Text),
+    Column('city', Text),
+    Column('camera_make', Text),
+    Column('camera_model', Text),
+    Column('video_codec', Text),
+    Column('keywords', ARRAY(Text).with_variant(JSON(), 'sqlite')),
+    # File name (also split into words), description and keywords, for free-text search.
+    Column('search_text', Text),
+)
+
+# Distinct values of the autocompleted search facets with the number of SearchIndex rows
+# using each, maintained alongside SearchIndex.
+facet_values_table = Table(
+    'FacetValues', metadata,
+    Column('field', Text, primary_key=True),
+    Column('value', Text, primary_key=True),
+    Column('usage_count', Integer, nullable=False),
+)
+
+# Full-text document of a SearchIndex row on Postgres. Queries must use this exact
+# expression (with the config as a literal, not a parameter) to hit its GIN index.
+# On SQLite the SearchIndexFts FTS5 table, created by Database, plays this role.
+search_index_document = func.to_tsvector(text("'simple'"), search_index_table.c.search_text)
+
 Index('idx__Locations__country', locations_table.c.country)
 Index('idx__Locations__city', locations_table.c.city)
 Index('idx__Locations__country_region_city',
       locations_table.c.country, locations_table.c.region, locations_table.c.city)
-Index('idx__Files__directory', files_table.c.directory)
+Index('idx__Files__directory_file_name', files_table.c.directory, files_table.c.file_name)
+Index('idx__FileDetails__location_id', file_details_table.c.location_id)
 Index('idx__Keywords__keyword', keywords_table.c.keyword)
+Index('idx__FileKeywords__keyword_id', file_keywords_table.c.keyword_id)
+Index('idx__FileFingerprints__size_sample_hash',
+      file_fingerprints_table.c.size, file_fingerprints_table.c.sample_hash)
+# Serves the LIKE 'dir/%' subtree lookup of Database.get_fingerprints, which a plain
+# btree only supports under the C collation.
+Index('idx__FileFingerprints__directory_pattern', file_fingerprints_table.c.directory,
+      postgresql_ops={'directory': 'text_pattern_ops'})
+
+# Every index ends in the result order (recorded_at_ts DESC NULLS LAST, file_name, md5_hash),
+# so a filtered page is read straight off the index without sorting; the leading
+# recorded_at_ts of idx__SearchIndex__order also serves date range filters.
+_search_order = (search_index_table.c.recorded_at_ts.desc().nullslast(),
+                 search_index_table.c.file_name, search_index_table.c.md5_hash)
+Index('idx__SearchIndex__order', *_search_order)
+Index('idx__SearchIndex__media_type', search_index_table.c.media_type, *_search_order)
+Index('idx__SearchIndex__country', search_index_table.c.country, *_search_order)
+Index('idx__SearchIndex__camera_make', search_index_table.c.camera_make, *_search_order)
+Index('idx__SearchIndex__camera_model', search_index_table.c.camera_model, *_search_order)
+Index('idx__SearchIndex__video_codec', search_index_table.c.video_codec, *_search_order)
+Index('idx__SearchIndex__keywords', search_index_table.c.keywords, postgresql_using='gin')
+Index('idx__SearchIndex__document', search_index_document, postgresql_using='gin')
+Index('idx__SearchIndex__file_name_trgm', search_index_table.c.file_name,
+      postgresql_using='gin', postgresql_ops={'file_name': 'gin_trgm_ops'})
+Index('idx__FacetValues__field_usage_count', facet_values_table.c.field,
+      facet_values_table.c.usage_count.desc())
+Index('idx__FacetValues__value_trgm', facet_values_table.c.value,
+      postgresql_using='gin', postgresql_ops={'value': 'gin_trgm_ops'})
@@ -0,0 +1,86 @@
+"""Throwaway database for the db benchmarks and `python -m db.explain --seed`."""
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateTable
+
+from db import engine as db_engine
+from db.database import Database
+from db.models import metadata
+from scanner.scanner import ScanResult
+
+
+@contextmanager
+def scratch_database(url: str | None = None):
+    """Point get_engine() at url (default: a temporary SQLite file) with a fresh schema, and
+    drop it again on exit. Refuses databases that already have a Files table."""
+    path = None
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        url = f'sqlite:///{path}'
+    engine = create_engine(url)
+    if inspect(engine).has_table('Files'):
+        raise SystemExit(f'{engine.url.render_as_string()} already has a Files table; '
+                         f'point --url at an empty scratch database.')
+    previous, db_engine._engine = db_engine._engine, engine
+    try:
+        _create_schema(engine)
+        Database().prepare_full_text_search()
+        yield engine
+    finally:
+        db_engine._engine = previous
+        if path is not None:
+            engine.dispose()
+            os.remove(path)
+        else:
+            metadata.drop_all(engine)
+            engine.dispose()
+
+
+def _create_schema(engine) -> None:
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as conn:
+            conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        metadata.create_all(engine)
+        return
+    # The schema is maintained for Postgres (Alembic); SQLite gets every table but only
+    # the indexes it can express (no NULLS LAST, GIN or expression indexes).
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            conn.execute(CreateTable(table))
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as conn:
+                    index.create(conn)
+            except DBAPIError:
+                pass
+
+
+def synthetic_metadata(files: int) -> tuple[list[ScanResult], list[dict], pd.DataFrame]:
+    """Scan results, detail records and keywords (3 each) for `files` synthetic DaVinci clips."""
+    rng = random.Random(0)
+    now = datetime.now()
+    start = datetime(2020, 1, 1)
+    scan_results, details, keywords = [], [], []
+    for i in range(files):
+        md5_hash = f'{i:032x}'
+        scan_results.append(ScanResult(
+            md5_hash=md5_hash, file_name=f'A{i // 500:03}_C{i % 500:03}.mov', file_extension='.mov',
+            media_type='video', directory=f'/footage/day{i // 500:04}', last_indexed_at=now))
+        details.append({
+            'md5_hash': md5_hash,
+            'recorded_at': (start + timedelta(minutes=7 * i)).strftime('%Y:%m:%d %H:%M:%S'),
+            'description': f'clip {i}', 'width': 3840, 'height': 2160, 'frame_rate': 25.0,
+            'video_codec': rng.choice(['hevc', 'prores', 'h264']), 'duration_tc': '00:00:42:00',
+            'shot': str(i % 20), 'scene': str(i // 20 % 50), 'take': str(i % 5),
+        })
+        keywords += [(md5_hash, f'keyword {k}') for k in rng.sample(range(300), 3)]
+    return scan_results, details, pd.DataFrame(keywords, columns=['md5_hash', 'keyword'])
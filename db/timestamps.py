@@ -0,0 +1,45 @@
+import re
+from datetime import datetime, timedelta
+
+# exiftool writes dates as 'YYYY:MM:DD HH:MM:SS[.fff][±HH:MM]'
+_EXIF_DATE = re.compile(r'^(\d{4}):(\d{2}):(\d{2})')
+
+# Formats DaVinci Resolve uses for "Date Recorded", depending on the project locale.
+_FALLBACK_FORMATS = [
+    '%a %b %d %Y %H:%M:%S',
+    '%a %b %d %H:%M:%S %Y',
+    '%d.%m.%Y %H:%M:%S',
+    '%d.%m.%Y %H:%M',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %I:%M:%S %p',
+    '%Y-%m-%d',
+]
+
+
+def parse_recorded_at(value: str | None) -> datetime | None:
+    """Parse the recording timestamp formats we ingest into a naive datetime.
+
+    Handles ffprobe's ISO 'creation_time' (UTC, with 'Z'), exiftool's 'YYYY:MM:DD HH:MM:SS'
+    and DaVinci's 'Date Recorded'. The result is local wall-clock time, like the camera
+    clocks exiftool and DaVinci report: values with a UTC offset keep their local time, and
+    UTC values (ffprobe) are converted to this machine's time zone. Returns None for
+    anything unparseable.
+    """
+    if not value:
+        return None
+    text = _EXIF_DATE.sub(r'\1-\2-\3', value.strip())
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        parsed = None
+        for fmt in _FALLBACK_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        if parsed is None:
+            return None
+    if parsed.utcoffset() == timedelta(0):
+        parsed = parsed.astimezone()
+    return parsed.replace(tzinfo=None)
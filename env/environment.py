@@ -59,6 +59,64 @@ class Environment:
     def get_worker_pool_size(self) -> int:
         return int(self.loadEnvironmentVariable("WORKER_POOL_SIZE", "4"))
 
+    def get_hash_block_size(self) -> int:
+        # Bytes per read while hashing. 1 MiB keeps Python overhead negligible on local
+        # disks; raise it (e.g. 4-8 MiB) for high-latency network shares.
+        return int(self.loadEnvironmentVariable("HASH_BLOCK_SIZE", str(1024 * 1024)))
+
+    def get_hash_block_size_overrides(self) -> dict[str, int]:
+        # "path=bytes" pairs, e.g. "/mnt/user/footage=8388608"; path is any path on the device.
+        return self._path_overrides("HASH_BLOCK_SIZE_OVERRIDES")
+
+    def get_scan_hash_mode(self) -> str:
+        # 'full' hashes every new or modified file completely. 'sampled' first compares a
+        # size + head/middle/tail sample hash and defers the full MD5 of matching files to
+        # a verification pass, run per batch of 200 matched files while the scan continues.
+        return self.loadEnvironmentVariable("SCAN_HASH_MODE", "full").lower()
+
+    def get_device_io_concurrency(self) -> int:
+        # Concurrent file reads per storage device (st_dev), independent of WORKER_POOL_SIZE.
+        return int(self.loadEnvironmentVariable("DEVICE_IO_CONCURRENCY", "2"))
+
+    def get_device_io_concurrency_overrides(self) -> dict[str, int]:
+        # "path=limit" pairs, e.g. "/mnt/ssd=8,/mnt/user/footage=1"; path is any path on the device.
+        return self._path_overrides("DEVICE_IO_CONCURRENCY_OVERRIDES")
+
+    def _path_overrides(self, name: str) -> dict[str, int]:
+        raw = self.loadEnvironmentVariable(name, "")
+        overrides = {}
+        for pair in raw.split(","):
+            path, sep, value = pair.partition("=")
+            if sep and path.strip():
+                overrides[path.strip()] = int(value)
+        return overrides
+
+    def get_process_pool_size(self) -> int:
+        return int(self.loadEnvironmentVariable("PROCESS_POOL_SIZE", str(os.cpu_count() or 1)))
+
+    def get_preview_decoder_threads(self) -> int:
+        # Decoder threads per ffmpeg preview run. Defaults to MEDIA_PROCESS_CORES shared out
+        # across the worker pool, so WORKER_POOL_SIZE concurrent previews fit the budget.
+        threads = self.loadEnvironmentVariable("PREVIEW_DECODER_THREADS")
+        if threads:
+            return int(threads)
+        return max(1, self.get_media_process_cores() // self.get_worker_pool_size())
+
+    def get_media_process_cores(self) -> int:
+        # Cores shared by all running ffmpeg/ffprobe/exiftool children; each reserves its
+        # thread count from this budget before it starts and queues while it is exhausted.
+        cores = self.loadEnvironmentVariable("MEDIA_PROCESS_CORES")
+        return int(cores) if cores else os.cpu_count() or 1
+
+    def get_media_process_timeout_seconds(self) -> float:
+        # ffmpeg/ffprobe/exiftool children still running after this long (e.g. hung on a
+        # corrupt file) are killed and treated as failed.
+        return float(self.loadEnvironmentVariable("MEDIA_PROCESS_TIMEOUT_SECONDS", "120"))
+
+    def get_worker_backend(self, job: str) -> str:
+        # 'thread' (default) or 'process' per CPU-bound job type, e.g. WORKER_BACKEND_HASHING.
+        return self.loadEnvironmentVariable(f"WORKER_BACKEND_{job.upper()}", "thread").lower()
+
     def get_db_pool_size(self) -> int:
         return int(self.loadEnvironmentVariable("DB_POOL_SIZE", "5"))
 
@@ -84,6 +142,37 @@ class Environment:
                     mapping[ext] = media_type
         return mapping
 
+    def get_scan_ignored_directories(self) -> list[str]:
+        # Glob patterns (case-insensitive) for directory names that scans never descend into.
+        raw = self.loadEnvironmentVariable(
+            "SCAN_IGNORED_DIRECTORIES",
+            ".Trashes,.Spotlight-V100,.fseventsd,.TemporaryItems,@eaDir,#recycle,"
+            "Proxy,Proxies,CacheClip,.cache",
+        )
+        return [p.strip() for p in raw.split(",") if p.strip()]
+
+    def get_preview_proxy_directories(self) -> list[str]:
+        # Subdirectories next to master clips that hold same-named proxies (DaVinci Resolve,
+        # Blackmagic cameras). Clip previews are decoded from a proxy when there is one.
+        raw = self.loadEnvironmentVariable("PREVIEW_PROXY_DIRECTORIES", "Proxy,Proxies")
+        return [d.strip() for d in raw.split(",") if d.strip()]
+
+    def get_watch_mode(self) -> str:
+        # off | auto | inotify | poll. 'auto' uses inotify on local filesystems and polls
+        # network mounts, whose server-side changes inotify cannot see.
+        return self.loadEnvironmentVariable("WATCH_MODE", "off").lower()
+
+    def get_watch_settle_seconds(self) -> float:
+        # How long a new file's size must stay unchanged before it is indexed.
+        return float(self.loadEnvironmentVariable("WATCH_SETTLE_SECONDS", "10"))
+
+    def get_watch_poll_interval_seconds(self) -> float:
+        return float(self.loadEnvironmentVariable("WATCH_POLL_INTERVAL_SECONDS", "60"))
+
+    def get_watch_generate_clip_preview(self) -> bool:
+        # Whether watcher-driven indexing renders clip previews, like the option of a manual scan.
+        return self.loadEnvironmentVariable("WATCH_GENERATE_CLIP_PREVIEW", "true").lower() == "true"
+
     def get_browser_hidden_extensions(self) -> list[str]:
         raw = self.loadEnvironmentVariable("BROWSER_HIDDEN_EXTENSIONS", ".xmp,.acr,.psd,.lrv,.identifier")
         return [e.strip().lower() for e in raw.split(",") if e.strip()]
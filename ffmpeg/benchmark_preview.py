@@ -0,0 +1,75 @@
+"""Clip preview benchmark: accurate vs. keyframe seeks, single-pass strip vs. one run per frame.
+
+    python -m ffmpeg.benchmark_preview /path/to/clip.mov [--duration 60] [--repeat 3]
+
+Times FFmpeg.generate_clip_preview (best of --repeat) three ways on one file:
+  - accurate seek: the single-pass strip with the plain '-ss' inputs used before
+    _seek_options (decodes from the previous keyframe up to each timestamp)
+  - keyframe seek: the current single-pass strip (_seek_options, _extract_strip)
+  - one run per frame: the _composite_clip_preview fallback with the same keyframe seeks
+The file is probed with ffprobe for its duration, codec and width (-lowres); pass
+--duration where ffprobe is not installed. Set MEDIA_PROCESS_CORES and
+PREVIEW_DECODER_THREADS to match the host being compared.
+"""
+import argparse
+import time
+from pathlib import Path
+from unittest import mock
+
+from ffmpeg.ffmpeg import FFmpeg, FFmpegInput, FFprobe
+
+
+def _accurate_seek_options(self, video: FFmpegInput, timestamp: str, width: int, threads: int) -> list[str]:
+    return ['-ss', timestamp]
+
+
+def _single_pass(ffmpeg: FFmpeg, video: FFmpegInput):
+    return ffmpeg.generate_clip_preview(video)
+
+
+def _accurate_single_pass(ffmpeg: FFmpeg, video: FFmpegInput):
+    with mock.patch.object(FFmpeg, '_seek_options', _accurate_seek_options):
+        return ffmpeg.generate_clip_preview(video)
+
+
+def _per_frame(ffmpeg: FFmpeg, video: FFmpegInput):
+    timestamps = ffmpeg.timestamp_for_keyframes(video)
+    return ffmpeg._composite_clip_preview(video, timestamps, 320, 180, 10, 5)
+
+
+def _best_of(fn, ffmpeg: FFmpeg, video: FFmpegInput, repeat: int) -> tuple[float, int]:
+    best, size = float('inf'), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        preview = fn(ffmpeg, video)
+        best = min(best, time.perf_counter() - start)
+        size = len(preview.data) if preview else 0
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--duration', type=int, default=None,
+                        help='clip length in seconds (default: probed with ffprobe)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    path = str(Path(args.path).resolve())
+    video = None if args.duration is not None else FFprobe().probe_file('benchmark', path)
+    if video is None:
+        if args.duration is None:
+            raise SystemExit('ffprobe could not read the file; pass --duration.')
+        video = FFmpegInput(md5_hash='benchmark', file_path=path, duration=args.duration)
+
+    ffmpeg = FFmpeg('benchmark')
+    print(f'{Path(path).name}: {video.duration}s, best of {args.repeat}')
+    for label, fn in [('accurate seek, single pass', _accurate_single_pass),
+                      ('keyframe seek, single pass', _single_pass),
+                      ('keyframe seek, run per frame', _per_frame)]:
+        elapsed, size = _best_of(fn, ffmpeg, video, args.repeat)
+        print(f'{label:<30} {elapsed:7.2f}s  ({size} bytes)')
+
+
+if __name__ == '__main__':
+    main()
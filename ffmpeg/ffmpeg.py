@@ -2,12 +2,16 @@ import logging
 import math
 import re
 import io
-import subprocess
 import json
-from pathlib import Path
 from PIL import Image
 from pydantic import BaseModel
 
+from env.environment import Environment
+from tasks.mediaprocesses import run_media_process
+
+# Decoders that can decode at 1/2, 1/4 or 1/8 resolution (-lowres), with their maximum factor.
+_LOWRES_CODECS = {'mjpeg': 3, 'jpeg2000': 3, 'mpeg4': 3, 'h263': 3, 'h263p': 3, 'msmpeg4v3': 3}
+
 
 def _seconds_to_tc(seconds: int) -> str:
     hh = seconds // 3600
@@ -16,6 +20,16 @@ def _seconds_to_tc(seconds: int) -> str:
     return f'{hh:02}:{mm:02}:{ss:02}:00'
 
 
+def _lowres_factor(video: "FFmpegInput", width: int) -> int:
+    """The largest -lowres factor that still decodes at least width pixels wide, or 0."""
+    if not isinstance(video, VideoProbeResult) or not video.width:
+        return 0
+    factor = 0
+    while factor < _LOWRES_CODECS.get(video.video_codec, 0) and video.width >> (factor + 1) >= width:
+        factor += 1
+    return factor
+
+
 def _eval_frame_rate(fraction: str) -> float | None:
     try:
         num, den = fraction.split('/')
@@ -80,7 +94,7 @@ class FFprobe:
             "-show_format",
             "-show_streams",
         ]
-        result = subprocess.run(command, capture_output=True, text=True)
+        result = run_media_process(command, text=True)
         try:
             info = json.loads(result.stdout)
         except json.JSONDecodeError:
@@ -157,30 +171,76 @@ class FFmpeg:
             padding=10,
             max_keyframes=5
     ) -> ClipPreview:
-        frame_files = []
         timestamps = self.timestamp_for_keyframes(video, max_keyframes=max_keyframes)
-        for i, timestamp in enumerate(timestamps):
-            frame_file = f"{self._identifier}_{i}.jpeg"
-            command = [
-                'ffmpeg', '-y',
-                '-ss', timestamp,
-                '-i', video.file_path,
-                '-vframes', '1',
-                '-vf', f'scale={width}:{height}',
-                '-q:v', '2',
-                frame_file
-            ]
-            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            if Path(frame_file).exists():
-                frame_files.append(frame_file)
-            else:
-                logging.warning(f'ffmpeg failed to extract frame at {timestamp} from {video.file_path}: {result.stderr.decode(errors="replace")}')
-
-        if not frame_files:
+        image_bytes = self._extract_strip(video, timestamps, width, height, padding, max_keyframes)
+        if image_bytes is None:
+            return self._composite_clip_preview(video, timestamps, width, height, padding, max_keyframes)
+        return ClipPreview(
+            md5_hash=video.md5_hash,
+            frames=len(timestamps),
+            frame_height=height,
+            frame_width=width,
+            padding=padding,
+            overall_height=height,
+            overall_width=width * max_keyframes + padding * (max_keyframes - 1),
+            data=image_bytes
+        )
+
+    def _seek_options(self, video: FFmpegInput, timestamp: str, width: int, threads: int) -> list[str]:
+        """Input options that decode only the keyframe before timestamp (at reduced resolution
+        where supported); the filters reset its PTS with setpts=PTS-STARTPTS so it isn't dropped."""
+        options = ['-ss', timestamp, '-noaccurate_seek', '-skip_frame', 'nokey',
+                   '-threads', str(threads)]
+        lowres = _lowres_factor(video, width)
+        if lowres:
+            options += ['-lowres', str(lowres)]
+        return options
+
+    def _extract_strip(self, video: FFmpegInput, timestamps: list[str], width: int, height: int,
+                       padding: int, tiles: int) -> bytes | None:
+        """The finished contact strip as JPEG bytes from a single ffmpeg run, or None if it fails.
+
+        Every timestamp becomes its own input with a fast (pre-input) seek, so only the
+        GOPs around the timestamps are read; the first frame of each is scaled, the last
+        one cloned until there are tiles frames, and the tile filter lays them out with
+        padding in between. The JPEG is written to stdout.
+        """
+        # Every input gets its own decoder, so split PREVIEW_DECODER_THREADS across them and
+        # reserve what the inputs use together.
+        input_threads = max(1, Environment().get_preview_decoder_threads() // len(timestamps))
+        command = ['ffmpeg', '-v', 'error']
+        for timestamp in timestamps:
+            command += [*self._seek_options(video, timestamp, width, input_threads), '-i', video.file_path]
+        graph = ''.join(f'[{i}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS,scale={width}:{height},setsar=1[f{i}];'
+                        for i in range(len(timestamps)))
+        graph += ''.join(f'[f{i}]' for i in range(len(timestamps)))
+        graph += f'concat=n={len(timestamps)}:v=1:a=0'
+        if tiles > len(timestamps):
+            graph += f',tpad=stop_mode=clone:stop={tiles - len(timestamps)}'
+        graph += f',tile={tiles}x1:padding={padding}:color=black'
+        command += ['-filter_complex', graph,
+                    '-filter_complex_threads', '1',
+                    '-frames:v', '1', '-q:v', '2',
+                    '-f', 'image2pipe', '-c:v', 'mjpeg', 'pipe:1']
+        result = run_media_process(command, threads=input_threads * len(timestamps))
+        if result.returncode != 0 or not result.stdout:
+            logging.info(f'Single-pass preview failed for {video.file_path}, extracting frames one by one: '
+                         f'{result.stderr.decode(errors="replace").strip()}')
+            return None
+        return result.stdout
+
+    def _composite_clip_preview(self, video: FFmpegInput, timestamps: list[str], width: int, height: int,
+                                padding: int, max_keyframes: int) -> ClipPreview | None:
+        """Fallback for clips the single-pass filter graph can't handle (e.g. a seek past a
+        truncated file's end): one ffmpeg run per timestamp, composited with PIL, so the
+        frames that can be extracted still make a preview."""
+        frames = [frame for frame in (self._extract_frame(video, timestamp, width, height)
+                                      for timestamp in timestamps) if frame is not None]
+        if not frames:
             logging.warning(f'No frames extracted for {video.file_path}, skipping clip preview')
             return None
 
-        images = [Image.open(frame_file) for frame_file in frame_files]
+        images = [Image.open(io.BytesIO(frame)) for frame in frames]
         while len(images) < max_keyframes:
             images.append(images[-1].copy())
         total_width = sum(image.width for image in images) + padding * (len(images) - 1)
@@ -196,9 +256,6 @@ class FFmpeg:
         new_image.save(buffer, format='JPEG')
         image_bytes = buffer.getvalue()
 
-        for file in frame_files:
-            subprocess.run(['rm', file])
-
         return ClipPreview(
             md5_hash=video.md5_hash,
             frames=len(timestamps),
@@ -213,23 +270,25 @@ class FFmpeg:
     def extract_frames(self, video: FFmpegInput, width=320, height=180, max_keyframes=5) -> list[bytes]:
         """Extract individual frames as a list of JPEG bytes, one per keyframe timestamp."""
         timestamps = self.timestamp_for_keyframes(video, max_keyframes=max_keyframes)
-        frames = []
-        for i, timestamp in enumerate(timestamps):
-            frame_file = f"{self._identifier}_frame_{i}.jpeg"
-            command = [
-                'ffmpeg', '-y',
-                '-ss', timestamp,
-                '-i', video.file_path,
-                '-vframes', '1',
-                '-vf', f'scale={width}:{height}',
-                '-q:v', '2',
-                frame_file
-            ]
-            subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            path = Path(frame_file)
-            if path.exists():
-                frames.append(path.read_bytes())
-                path.unlink()
-            else:
-                logging.warning(f'ffmpeg failed to extract frame at {timestamp} from {video.file_path}')
-        return frames
+        frames = [self._extract_frame(video, timestamp, width, height) for timestamp in timestamps]
+        return [frame for frame in frames if frame is not None]
+
+    def _extract_frame(self, video: FFmpegInput, timestamp: str, width: int, height: int) -> bytes | None:
+        """One scaled frame as JPEG bytes, piped from ffmpeg's stdout rather than written to disk."""
+        threads = Environment().get_preview_decoder_threads()
+        command = [
+            'ffmpeg', '-v', 'error',
+            *self._seek_options(video, timestamp, width, threads),
+            '-i', video.file_path,
+            '-frames:v', '1',
+            '-vf', f'setpts=PTS-STARTPTS,scale={width}:{height}',
+            '-q:v', '2',
+            '-f', 'image2pipe', '-c:v', 'mjpeg',
+            'pipe:1'
+        ]
+        result = run_media_process(command, threads=threads)
+        if result.returncode != 0 or not result.stdout:
+            logging.warning(f'ffmpeg failed to extract frame at {timestamp} from {video.file_path}: '
+                            f'{result.stderr.decode(errors="replace").strip()}')
+            return None
+        return result.stdout
@@ -0,0 +1,46 @@
+"""Low-resolution proxies recorded or rendered alongside master clips.
+
+Decoding preview frames from a proxy instead of a 4K/5.7K master (360 .insv footage
+especially) is an order of magnitude cheaper, and the proxy covers the same time range.
+"""
+import os
+import re
+
+from env.environment import Environment
+
+# Camera proxies: GoPro and Insta360 write .LRV, DJI writes .LRF (both plain MP4).
+_CAMERA_PROXY_EXTENSIONS = ('.LRV', '.lrv', '.LRF', '.lrf')
+# Proxies rendered by DaVinci Resolve or recorded by Blackmagic cameras into a subdirectory.
+_DIRECTORY_PROXY_EXTENSIONS = ('.mov', '.mp4', '.mxf', '.MOV', '.MP4', '.MXF')
+# GoPro HERO: GH010123.MP4 / GX010123.MP4 record their proxy as GL010123.LRV.
+_GOPRO = re.compile(r'^G[HX](\d{6})$', re.IGNORECASE)
+# Insta360: VID_20240101_120000_00_001.insv records LRV_20240101_120000_<lens>_001.lrv,
+# where the lens index of the proxy differs between camera models.
+_INSTA360 = re.compile(r'^VID_(\d{8}_\d{6})_\d{2}_(\d{3})$', re.IGNORECASE)
+_INSTA360_LENSES = ('00', '01', '10', '11')
+
+
+def _camera_proxy_stems(stem: str) -> list[str]:
+    stems = [stem]
+    if match := _GOPRO.match(stem):
+        stems.append(f'GL{match.group(1)}')
+    if match := _INSTA360.match(stem):
+        stems += [f'LRV_{match.group(1)}_{lens}_{match.group(2)}' for lens in _INSTA360_LENSES]
+    return stems
+
+
+def find_video_proxy(file_path: str) -> str | None:
+    """Path of a proxy for the master clip at file_path, or None if there is none."""
+    directory, name = os.path.split(file_path)
+    stem = os.path.splitext(name)[0]
+    for proxy_stem in _camera_proxy_stems(stem):
+        for extension in _CAMERA_PROXY_EXTENSIONS:
+            candidate = os.path.join(directory, proxy_stem + extension)
+            if os.path.isfile(candidate):
+                return candidate
+    for proxy_directory in Environment().get_preview_proxy_directories():
+        for extension in _DIRECTORY_PROXY_EXTENSIONS:
+            candidate = os.path.join(directory, proxy_directory, stem + extension)
+            if os.path.isfile(candidate):
+                return candidate
+    return None
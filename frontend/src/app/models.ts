@@ -93,6 +93,7 @@ export interface Location {
 }
 
 export interface FileSearchQuery {
+  text?: string | null;
   media_types?: string[];
   keywords?: string[];
   country?: string | null;
@@ -103,6 +104,14 @@ export interface FileSearchQuery {
   video_codec?: string | null;
   page?: number;
   page_size?: number;
+  cursor?: string | null;
+  include_total?: boolean;
+  include_facets?: boolean;
+}
+
+export interface FacetCount {
+  value: string;
+  count: number;
 }
 
 export interface SearchResult {
@@ -116,10 +125,12 @@ export interface SearchResult {
 }
 
 export interface SearchResponse {
-  total: number;
+  total: number | null;
   page: number;
   page_size: number;
   items: SearchResult[];
+  next_cursor: string | null;
+  facets: Record<string, FacetCount[]> | null;
 }
 
 export interface MapPoint {
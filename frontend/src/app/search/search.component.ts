@@ -5,7 +5,7 @@ import { debounceTime, distinctUntilChanged, map, switchMap } from 'rxjs/operato
 
 import { ApiService } from '../services/api.service';
 import { FileDetailPanelComponent } from '../shared/file-detail-panel/file-detail-panel.component';
-import { FileInfo, FileSearchQuery, SearchResponse, SearchResult, VIDEO_TYPES, PHOTO_TYPES } from '../models';
+import { FacetCount, FileInfo, FileSearchQuery, SearchResponse, SearchResult, VIDEO_TYPES, PHOTO_TYPES } from '../models';
 
 const MEDIA_TYPE_OPTIONS = [
   { value: 'video',       label: 'Video' },
@@ -30,6 +30,7 @@ export class SearchComponent implements OnInit, OnDestroy {
   readonly mediaTypeOptions = MEDIA_TYPE_OPTIONS;
 
   // ── Filter state ──
+  text               = signal('');
   selectedMediaTypes = signal<Set<string>>(new Set());
   selectedKeywords   = signal<string[]>([]);
   country            = signal('');
@@ -50,6 +51,8 @@ export class SearchComponent implements OnInit, OnDestroy {
   // ── Results ──
   results        = signal<SearchResult[]>([]);
   total          = signal(0);
+  nextCursor     = signal<string | null>(null);
+  facets         = signal<Record<string, FacetCount[]>>({});
   currentPage    = signal(1);
   loading        = signal(false);
   hasFilters     = signal(false);
@@ -141,12 +144,19 @@ export class SearchComponent implements OnInit, OnDestroy {
     this.onFilterChange();
   }
 
+  facetCount(facet: string, value: string): number | null {
+    const counts = this.facets()[facet];
+    if (!counts) return null;
+    return counts.find(c => c.value === value)?.count ?? 0;
+  }
+
   onFacetInput(field: string, q: string): void {
     this.facetInput$.next({ field, q });
   }
 
   onFilterChange(): void {
     const hasAny =
+      !!this.text().trim() ||
       this.selectedMediaTypes().size > 0 ||
       this.selectedKeywords().length > 0 ||
       !!this.country() ||
@@ -157,7 +167,7 @@ export class SearchComponent implements OnInit, OnDestroy {
       !!this.videoCodec();
     this.hasFilters.set(hasAny);
     if (hasAny) this.filterChange$.next();
-    else { this.results.set([]); this.total.set(0); }
+    else { this.results.set([]); this.total.set(0); this.facets.set({}); }
   }
 
   clearFacet(field: 'country' | 'cameraMake' | 'cameraModel' | 'videoCodec'): void {
@@ -175,6 +185,7 @@ export class SearchComponent implements OnInit, OnDestroy {
 
   private buildQuery(page: number): FileSearchQuery {
     return {
+      text:        this.text().trim() || null,
       media_types: [...this.selectedMediaTypes()],
       keywords:    this.selectedKeywords(),
       country:     this.country() || null,
@@ -185,6 +196,9 @@ export class SearchComponent implements OnInit, OnDestroy {
       video_codec:  this.videoCodec() || null,
       page,
       page_size:   this.PAGE_SIZE,
+      cursor:      page > 1 ? this.nextCursor() : null,
+      // Counts only change with the filters, not while paging.
+      include_facets: page === 1,
     };
   }
 
@@ -192,7 +206,9 @@ export class SearchComponent implements OnInit, OnDestroy {
     this.loading.set(true);
     this.api.searchFiles(this.buildQuery(this.currentPage())).subscribe({
       next: (resp: SearchResponse) => {
-        this.total.set(resp.total);
+        this.total.set(resp.total ?? this.total());
+        this.nextCursor.set(resp.next_cursor);
+        if (resp.facets) this.facets.set(resp.facets);
         this.results.set(append ? [...this.results(), ...resp.items] : resp.items);
         this.loading.set(false);
       },
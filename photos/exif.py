@@ -1,7 +1,6 @@
 import io
 import json
 import logging
-import subprocess
 from pathlib import Path
 
 import numpy as np
@@ -9,6 +8,8 @@ import rawpy
 from PIL import Image, ImageOps
 from pydantic import BaseModel
 
+from tasks.mediaprocesses import run_media_process
+
 
 class PhotoProbeResult(BaseModel):
     md5_hash: str
@@ -33,6 +34,11 @@ class PhotoProbeResult(BaseModel):
     altitude: float | None = None
 
 
+_RAW_EXTENSIONS = {'.rw2', '.dng'}
+# Thumbnails of RAW files are scaled from a same-named camera JPEG when one exists,
+# instead of demosaicing the sensor data.
+_PROXY_EXTENSIONS = ('.JPG', '.jpg', '.JPEG', '.jpeg', '.insp', '.INSP')
+
 # exiftool tags requested for every photo (JPEG, RW2, …). A trailing '#' forces the
 # raw numeric value (e.g. FocalLength 5.4 instead of "5.4 mm"). Tags without '#' keep
 # exiftool's human-readable form, which is what we want for ColorSpace ("sRGB"),
@@ -57,10 +63,7 @@ def dump_all_exif(file_path: str) -> list[dict]:
     come back as a human placeholder string ('(Binary data N bytes, ...)'), which we keep.
     """
     try:
-        result = subprocess.run(
-            ['exiftool', '-json', '-G1', file_path],
-            capture_output=True, text=True,
-        )
+        result = run_media_process(['exiftool', '-json', '-G1', file_path], text=True, interactive=True)
         data = json.loads(result.stdout)[0]
     except Exception as e:
         logging.debug(f'exiftool full dump failed for {file_path}: {e}')
@@ -80,10 +83,7 @@ def dump_all_exif(file_path: str) -> list[dict]:
 def probe_photo(md5_hash: str, file_path: str) -> PhotoProbeResult | None:
     """Extract photo metadata via exiftool. Used for all photo formats (JPEG, RW2, …)."""
     try:
-        result = subprocess.run(
-            ['exiftool', '-json', *_EXIFTOOL_TAGS, file_path],
-            capture_output=True, text=True,
-        )
+        result = run_media_process(['exiftool', '-json', *_EXIFTOOL_TAGS, file_path], text=True)
         data = json.loads(result.stdout)[0]
     except Exception as e:
         logging.debug(f'exiftool probe failed for {file_path}: {e}')
@@ -126,10 +126,25 @@ def probe_photo(md5_hash: str, file_path: str) -> PhotoProbeResult | None:
     return probe
 
 
+def find_photo_proxy(file_path: str) -> str | None:
+    """The camera JPEG shot alongside a RAW file (RAW+JPEG, Insta360 .dng + .insp), if any."""
+    path = Path(file_path)
+    if path.suffix.lower() not in _RAW_EXTENSIONS:
+        return None
+    for extension in _PROXY_EXTENSIONS:
+        candidate = path.with_suffix(extension)
+        if candidate.is_file():
+            return str(candidate)
+    return None
+
+
 def generate_photo_thumbnail(md5_hash: str, file_path: str, max_width: int = 600) -> bytes | None:
     try:
         ext = Path(file_path).suffix.lower()
-        if ext == '.rw2':
+        proxy = find_photo_proxy(file_path)
+        if proxy is not None:
+            img = ImageOps.exif_transpose(Image.open(proxy))
+        elif ext == '.rw2':
             img = _open_rw2(file_path)
         else:
             img = Image.open(file_path)
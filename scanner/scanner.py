@@ -1,11 +1,16 @@
 import hashlib
+import os
+import stat
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
 from pydantic import BaseModel, StrictStr
 
 from env.environment import Environment
-from tasks.workerpool import parallel_map
+from scanner.walker import walk_media_files
+from tasks.workerpool import device_overrides, parallel_imap, run_job
 
 
 class ScanResult(BaseModel):
@@ -15,50 +20,226 @@ class ScanResult(BaseModel):
     media_type: StrictStr | None
     directory: StrictStr
     last_indexed_at: datetime
+    # Fingerprint the hash was derived from (see FileFingerprints). reused_hash is
+    # True when the MD5 came from the fingerprint cache instead of reading the file;
+    # sampled_hash when it was inferred from a matching sample hash and still awaits
+    # verification against the full MD5.
+    size: int | None = None
+    mtime_ns: int | None = None
+    inode: int | None = None
+    sample_hash: StrictStr | None = None
+    reused_hash: bool = False
+    sampled_hash: bool = False
+
+
+# Walked files are paired with their stored fingerprints in batches of up to this many
+# paths (starting at one and doubling, so the first file isn't held back by the walk).
+_FINGERPRINT_BATCH_SIZE = 500
 
 
 class Scanner:
-    __block_size: int
+    __block_size: int | None
+    __find_fingerprints: Callable[[list[str]], dict[str, dict]] | None
+    __sampled: bool
+    __find_by_sample: Callable[[int, str], str | None] | None
 
-    def __init__(self, block_size: int = 4096):
+    def __init__(self, block_size: int | None = None,
+                 find_fingerprints: Callable[[list[str]], dict[str, dict]] | None = None,
+                 sampled: bool = False,
+                 find_by_sample: Callable[[int, str], str | None] | None = None):
+        """find_fingerprints maps a batch of file paths to their last known {size, mtime_ns,
+        inode, sample_hash, md5_hash} (see Database.get_fingerprints_for_paths); it is called
+        per batch of walked files, so memory doesn't grow with the tree. Files whose stat
+        still matches are not re-hashed. With sampled=True, files whose stat changed but whose size and sample hash
+        still match (or match another known file via find_by_sample) reuse that MD5 too.
+        Without block_size, each file is read in blocks of its device's HASH_BLOCK_SIZE."""
         self.__block_size = block_size
+        self.__find_fingerprints = find_fingerprints
+        self.__sampled = sampled
+        self.__find_by_sample = find_by_sample
+        self.reused = 0
+        self.sampled = 0
+        self.hashed = 0
 
     def scan_directory(self, path: Path) -> [ScanResult]:
-        return self.scan_files(path.rglob('*'))
+        return list(self.iter_directory(path))
 
     def scan_files(self, files: [Path]) -> [ScanResult]:
+        return list(self.iter_files(files))
+
+    def iter_directory(self, path: Path) -> Iterator[ScanResult]:
         env = Environment()
-        considered_file_extensions = env.get_scanning_file_extensions()
-        media_type_map = env.get_media_type_map()
+        return self.__hash_candidates(
+            walk_media_files(path, set(env.get_scanning_file_extensions()),
+                             env.get_scan_ignored_directories())
+        )
 
-        candidates = []
-        for f in files:
-            f_path = Path(f)
-            if f_path.name.startswith('._'):  # macOS AppleDouble sidecars, hidden in the browser too
-                continue
-            if not f_path.is_dir() and f_path.exists() and f_path.suffix.lower() in considered_file_extensions:
-                candidates.append(f_path)
+    def iter_files(self, files: Iterable[Path]) -> Iterator[ScanResult]:
+        considered_file_extensions = Environment().get_scanning_file_extensions()
 
-        # Hashing is I/O bound (reading whole files, often large videos over the
-        # network), so fan it out across the shared worker pool. Order is preserved.
-        hashes = parallel_map(candidates, lambda p: self.md5_hash(str(p)))
+        def candidates():
+            for f in files:
+                f_path = Path(f)
+                if f_path.name.startswith('._'):  # macOS AppleDouble sidecars, hidden in the browser too
+                    continue
+                if f_path.suffix.lower() not in considered_file_extensions:
+                    continue
+                try:
+                    st = f_path.stat()
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    yield f_path, st
+
+        return self.__hash_candidates(candidates())
+
+    def __hash_candidates(self, candidates: Iterable[tuple[Path, os.stat_result]]) -> Iterator[ScanResult]:
+        """Lazily hash (path, stat) candidates, yielding ScanResults in input order as soon
+        as they are ready.
+
+        Walking, stat-ing and hashing overlap: only a bounded number of files is in
+        flight at any time, so the first results arrive before the tree is fully walked.
+        The reused/sampled/hashed counters are updated as results are yielded.
+        """
+        media_type_map = Environment().get_media_type_map()
+        self.reused = self.sampled = self.hashed = 0
+
+        def fingerprint_hash(item):
+            candidate, known = item
+            return candidate, self.__fingerprint_hash(candidate, known)
 
+        # Hashing is I/O bound (reading whole files, often large videos over the
+        # network), so fan it out across the shared worker pool, limited per device so
+        # each disk sees few concurrent readers. Order is preserved.
         indexed_at = datetime.now()
-        return [
-            ScanResult(
+        hashes = parallel_imap(self.__with_fingerprints(candidates), fingerprint_hash,
+                               device=lambda item: item[0][1].st_dev)
+        for (f_path, st), (md5_hash, sample_hash, reused, sampled) in hashes:
+            if reused:
+                self.reused += 1
+            elif sampled:
+                self.sampled += 1
+            else:
+                self.hashed += 1
+            yield ScanResult(
                 md5_hash=md5_hash,
                 file_name=f_path.name,
                 file_extension=f_path.suffix,
                 media_type=media_type_map.get(f_path.suffix.lower()),
                 directory=str(f_path.parent),
                 last_indexed_at=indexed_at,
+                size=st.st_size,
+                mtime_ns=st.st_mtime_ns,
+                inode=st.st_ino,
+                sample_hash=sample_hash,
+                reused_hash=reused,
+                sampled_hash=sampled,
             )
-            for f_path, md5_hash in zip(candidates, hashes)
-        ]
 
-    def md5_hash(self, path):
-        hasher = hashlib.md5()
+    def __with_fingerprints(self, candidates: Iterable[tuple[Path, os.stat_result]]):
+        """Pair each (path, stat) candidate with its stored fingerprint (or None)."""
+        if self.__find_fingerprints is None:
+            for candidate in candidates:
+                yield candidate, None
+            return
+        batch = []
+        size = 1
+        for candidate in candidates:
+            batch.append(candidate)
+            if len(batch) >= size:
+                yield from self.__paired(batch)
+                batch = []
+                size = min(2 * size, _FINGERPRINT_BATCH_SIZE)
+        if batch:
+            yield from self.__paired(batch)
+
+    def __paired(self, batch: list[tuple[Path, os.stat_result]]):
+        known = self.__find_fingerprints([str(f_path) for f_path, _ in batch])
+        for candidate in batch:
+            yield candidate, known.get(str(candidate[0]))
+
+    def __fingerprint_hash(self, candidate, known: dict | None) -> tuple[str, str | None, bool, bool]:
+        """(md5_hash, sample_hash, reused, sampled) for one (path, stat) candidate and its
+        stored fingerprint."""
+        f_path, st = candidate
+        if known is not None and _fingerprint_matches(known, st):
+            return known['md5_hash'], known.get('sample_hash'), True, False
+
+        if not self.__sampled:
+            return self.md5_hash(str(f_path), st.st_dev), None, False, False
+
+        sample_hash = self.sample_hash(str(f_path), st.st_size)
+        if known is not None and known['size'] == st.st_size and known.get('sample_hash') == sample_hash:
+            return known['md5_hash'], sample_hash, False, True
+        if self.__find_by_sample is not None:
+            duplicate_md5 = self.__find_by_sample(st.st_size, sample_hash)
+            if duplicate_md5 is not None:
+                return duplicate_md5, sample_hash, False, True
+        return self.md5_hash(str(f_path), st.st_dev), sample_hash, False, False
+
+    def md5_hash(self, path, device: int | None = None):
+        block_size = self.__block_size
+        if block_size is None:
+            block_size = _device_block_size(os.stat(path).st_dev if device is None else device)
+        return run_job('hashing', md5_file, str(path), block_size)
+
+    def sample_hash(self, path, size: int, chunk_size: int = 1024 * 1024) -> str:
+        """Cheap content fingerprint: MD5 over the file size plus its head, middle and tail
+        chunks. Reads at most 3 × chunk_size bytes regardless of the file size."""
+        hasher = hashlib.md5(str(size).encode())
         with open(path, "rb") as file:
-            for block in iter(lambda: file.read(self.__block_size), b""):
-                hasher.update(block)
+            if size <= 3 * chunk_size:
+                hasher.update(file.read())
+            else:
+                for offset in (0, (size - chunk_size) // 2, size - chunk_size):
+                    file.seek(offset)
+                    hasher.update(file.read(chunk_size))
         return hasher.hexdigest()
+
+
+def md5_file(path: str, block_size: int) -> str:
+    hasher = hashlib.md5()
+    buffer = _read_buffer(block_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as file:
+        _advise_sequential(file.fileno())
+        while n := file.readinto(buffer):
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+_block_sizes: dict[int, int] | None = None
+
+
+def _device_block_size(device: int) -> int:
+    """HASH_BLOCK_SIZE, or the HASH_BLOCK_SIZE_OVERRIDES entry for the device."""
+    global _block_sizes
+    if _block_sizes is None:
+        _block_sizes = device_overrides(Environment().get_hash_block_size_overrides())
+    return _block_sizes.get(device, Environment().get_hash_block_size())
+
+
+_buffers = threading.local()
+
+
+def _read_buffer(size: int) -> bytearray:
+    """Per-thread reusable read buffer, so hashing a file allocates nothing per block."""
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None or len(buffer) != size:
+        buffer = _buffers.buffer = bytearray(size)
+    return buffer
+
+
+def _advise_sequential(fd: int):
+    # Lets the kernel read ahead aggressively; not available on macOS/Windows.
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def _fingerprint_matches(known: dict, st: os.stat_result) -> bool:
+    return (known['size'] == st.st_size
+            and known['mtime_ns'] == st.st_mtime_ns
+            and known['inode'] == st.st_ino)
@@ -0,0 +1,51 @@
+import fnmatch
+import logging
+import os
+from collections import deque
+from pathlib import Path
+from typing import Iterator
+
+from tasks.workerpool import get_worker_pool
+
+
+def walk_media_files(root: Path, extensions: set[str],
+                     ignored_directories: list[str]) -> Iterator[tuple[Path, os.stat_result]]:
+    """Yield (path, stat) for every regular file below root whose extension is in extensions.
+
+    Built on os.scandir so directory type checks come from the cached DirEntry (no stat per
+    entry) and only files that pass the extension filter are stat-ed, once. Subdirectories
+    are listed concurrently on the shared worker pool, which hides per-directory round trips
+    on network mounts. Directories matching one of the ignored_directories glob patterns
+    (case-insensitive, matched against the directory name) are not descended into.
+    """
+    ignored = [p.lower() for p in ignored_directories]
+    pool = get_worker_pool()
+    pending = deque([pool.submit(_scan_directory, str(root), extensions, ignored)])
+    while pending:
+        subdirectories, files = pending.popleft().result()
+        for subdirectory in subdirectories:
+            pending.append(pool.submit(_scan_directory, subdirectory, extensions, ignored))
+        yield from files
+
+
+def _scan_directory(path: str, extensions: set[str],
+                    ignored: list[str]) -> tuple[list[str], list[tuple[Path, os.stat_result]]]:
+    subdirectories = []
+    files = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith('._'):  # macOS AppleDouble sidecars, hidden in the browser too
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not any(fnmatch.fnmatchcase(name.lower(), p) for p in ignored):
+                            subdirectories.append(entry.path)
+                    elif os.path.splitext(name)[1].lower() in extensions and entry.is_file():
+                        files.append((Path(entry.path), entry.stat()))
+                except OSError:
+                    continue
+    except OSError as e:
+        logging.warning(f'Skipping unreadable directory {path}: {e}')
+    return subdirectories, files
@@ -0,0 +1,247 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Event, Thread
+from typing import Callable
+
+from env.environment import Environment
+from scanner.walker import walk_media_files
+
+# inotify(7) event masks
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct('iIII')
+
+# inotify only sees changes made through the local kernel, never those made on the
+# server side of a network share, so these mounts are always polled.
+_NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', 'fuse.rclone', '9p'}
+
+
+class FootageWatcher:
+    """Watches a directory tree and hands settled media files to on_files_ready.
+
+    Events are debounced per file: a file is only reported once its size has stayed the
+    same for settle_seconds, so clips still being copied from a card are not hashed
+    half-written. Uses inotify on local Linux filesystems and falls back to polling
+    (periodic scandir snapshots) on network mounts or other platforms. Both callbacks run
+    on a separate indexer thread, so events keep being read while a batch is indexed;
+    on_directory_changed(root) replaces per-file reports when inotify's queue overflows.
+    """
+
+    def __init__(self, root: Path, on_files_ready: Callable[[list[Path]], None],
+                 on_directory_changed: Callable[[Path], None], mode: str = 'auto',
+                 settle_seconds: float = 10.0, poll_interval_seconds: float = 30.0):
+        env = Environment()
+        self._root = root
+        self._on_files_ready = on_files_ready
+        self._on_directory_changed = on_directory_changed
+        self._settle_seconds = settle_seconds
+        self._poll_interval_seconds = poll_interval_seconds
+        self._extensions = set(env.get_scanning_file_extensions())
+        self._ignored = [p.lower() for p in env.get_scan_ignored_directories()]
+        self._use_inotify = mode == 'inotify' or (mode == 'auto' and _inotify_supported(root))
+        # path -> (size at last check, monotonic time the size last changed)
+        self._pending: dict[Path, tuple[int, float]] = {}
+        # Settled file batches (list[Path]) and directories to rescan (Path), in order.
+        self._deliveries: Queue[list[Path] | Path] = Queue()
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name='footage-watcher', daemon=True)
+        self._indexer = Thread(target=self._deliver, name='footage-indexer', daemon=True)
+
+    def start(self):
+        logging.info(f'Watching {self._root} for new footage '
+                     f'({"inotify" if self._use_inotify else "polling"})')
+        self._thread.start()
+        self._indexer.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._indexer.join(timeout=5)
+
+    def _run(self):
+        try:
+            if self._use_inotify:
+                self._run_inotify()
+            else:
+                self._run_polling()
+        except Exception:
+            logging.exception(f'Footage watcher for {self._root} stopped')
+
+    # ------------------------------------------------------------------
+    # Event sources
+    # ------------------------------------------------------------------
+
+    def _run_inotify(self):
+        inotify = _Inotify()
+        try:
+            watches: dict[int, Path] = {}
+            self._watch_tree(inotify, watches, self._root, enqueue=False)
+            tick = min(1.0, self._settle_seconds)
+            while not self._stop.is_set():
+                for wd, mask, name in inotify.read(timeout=tick):
+                    if mask & _IN_Q_OVERFLOW:
+                        # Events were lost: re-add watches and let a directory scan find the
+                        # changes, instead of reporting every file under the root.
+                        logging.warning('inotify queue overflowed, rescanning watched tree')
+                        self._watch_tree(inotify, watches, self._root, enqueue=False)
+                        self._deliveries.put(self._root)
+                        continue
+                    if wd not in watches or not name:
+                        continue
+                    path = watches[wd] / name
+                    if mask & _IN_ISDIR:
+                        if mask & (_IN_CREATE | _IN_MOVED_TO) and not self._is_ignored(name):
+                            # Files may land in a new directory before its watch exists.
+                            self._watch_tree(inotify, watches, path, enqueue=True)
+                    else:
+                        self._touch(path)
+                self._flush_settled()
+        finally:
+            inotify.close()
+
+    def _watch_tree(self, inotify: '_Inotify', watches: dict[int, Path], top: Path, enqueue: bool):
+        for directory, subdirectories, _ in os.walk(top):
+            subdirectories[:] = [d for d in subdirectories if not self._is_ignored(d)]
+            try:
+                watches[inotify.add_watch(directory, _WATCH_MASK)] = Path(directory)
+            except OSError as e:
+                logging.warning(f'Cannot watch {directory}: {e}')
+        if enqueue:
+            for path, _ in walk_media_files(top, self._extensions, self._ignored):
+                self._touch(path)
+
+    def _run_polling(self):
+        snapshot = self._snapshot()
+        last_poll = time.monotonic()
+        while not self._stop.wait(min(1.0, self._settle_seconds)):
+            if time.monotonic() - last_poll >= self._poll_interval_seconds:
+                current = self._snapshot()
+                for path, signature in current.items():
+                    if snapshot.get(path) != signature:
+                        self._touch(path)
+                snapshot = current
+                last_poll = time.monotonic()
+            self._flush_settled()
+
+    def _snapshot(self) -> dict[Path, tuple[int, int]]:
+        return {path: (st.st_size, st.st_mtime_ns)
+                for path, st in walk_media_files(self._root, self._extensions, self._ignored)}
+
+    # ------------------------------------------------------------------
+    # Debouncing
+    # ------------------------------------------------------------------
+
+    def _touch(self, path: Path):
+        if path.name.startswith('._') or path.suffix.lower() not in self._extensions:
+            return
+        if any(self._is_ignored(part) for part in path.relative_to(self._root).parts[:-1]):
+            return
+        self._pending[path] = (-1, time.monotonic())
+
+    def _flush_settled(self):
+        now = time.monotonic()
+        ready = []
+        for path, (size, changed_at) in list(self._pending.items()):
+            try:
+                current_size = path.stat().st_size
+            except OSError:
+                del self._pending[path]  # deleted or moved away again
+                continue
+            if current_size != size:
+                self._pending[path] = (current_size, now)
+            elif now - changed_at >= self._settle_seconds:
+                ready.append(path)
+                del self._pending[path]
+        if ready:
+            self._deliveries.put(ready)
+
+    def _deliver(self):
+        while not self._stop.is_set():
+            try:
+                delivery = self._deliveries.get(timeout=1.0)
+            except Empty:
+                continue
+            try:
+                if isinstance(delivery, Path):
+                    self._on_directory_changed(delivery)
+                else:
+                    self._on_files_ready(delivery)
+            except Exception:
+                logging.exception('Indexing watched footage failed')
+
+    def _is_ignored(self, name: str) -> bool:
+        return any(fnmatch.fnmatchcase(name.lower(), p) for p in self._ignored)
+
+
+class _Inotify:
+    """Minimal ctypes binding for inotify(7); the stdlib has none."""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read(self, timeout: float) -> list[tuple[int, int, str]]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self._fd)
+
+
+def _inotify_supported(path: Path) -> bool:
+    if not hasattr(os, 'O_CLOEXEC') or ctypes.util.find_library('c') is None:
+        return False
+    return _filesystem_type(path) not in _NETWORK_FILESYSTEMS
+
+
+def _filesystem_type(path: Path) -> str | None:
+    """fstype of the mount containing path, from /proc/mounts (Linux only)."""
+    try:
+        with open('/proc/mounts') as mounts:
+            entries = [line.split()[1:3] for line in mounts]
+    except OSError:
+        return None
+    resolved = str(path.resolve())
+    best, fstype = '', None
+    for mount_point, mount_type in entries:
+        mount_point = mount_point.replace('\\040', ' ')
+        if (resolved == mount_point or resolved.startswith(mount_point.rstrip('/') + '/')) \
+                and len(mount_point) > len(best):
+            best, fstype = mount_point, mount_type
+    return fstype
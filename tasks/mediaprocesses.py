@@ -0,0 +1,100 @@
+import logging
+import signal
+import subprocess
+from collections import deque
+from threading import Condition, Lock
+
+from pydantic import BaseModel
+
+from env.environment import Environment
+
+
+class MediaProcessStats(BaseModel):
+    cores: int
+    cores_in_use: int
+    running: int
+    waiting: int
+    killed: int
+
+
+class _CoreBudget:
+    def __init__(self, cores: int):
+        self.cores = cores
+        self.in_use = 0
+        self.running = 0
+        self.killed = 0
+        self.waiting: deque[object] = deque()
+        self.condition = Condition()
+
+    def acquire(self, threads: int):
+        ticket = object()
+        with self.condition:
+            self.waiting.append(ticket)
+            while self.waiting[0] is not ticket or self.in_use + threads > self.cores:
+                self.condition.wait()
+            self.waiting.popleft()
+            self.in_use += threads
+            self.running += 1
+            self.condition.notify_all()
+
+    def release(self, threads: int, killed: bool):
+        with self.condition:
+            self.in_use -= threads
+            self.running -= 1
+            self.killed += killed
+            self.condition.notify_all()
+
+
+_budget: _CoreBudget | None = None
+_budget_lock = Lock()
+
+
+def _get_budget() -> _CoreBudget:
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = _CoreBudget(max(1, Environment().get_media_process_cores()))
+    return _budget
+
+
+def run_media_process(command: list[str], threads: int = 1, text: bool = False,
+                      interactive: bool = False) -> subprocess.CompletedProcess:
+    """Run an ffmpeg/ffprobe/exiftool command within the process-wide core budget.
+
+    The child starts once threads of the MEDIA_PROCESS_CORES budget are free (first come,
+    first served), so worker threads queue here instead of oversubscribing the CPU with
+    ffmpeg's own per-process threading. A child still running after
+    MEDIA_PROCESS_TIMEOUT_SECONDS is killed and reported like a failed run (returncode
+    -SIGKILL, empty stdout), so a batch of corrupt files can't stall a scan.
+
+    interactive runs skip the budget: single-file calls a user is waiting on (the EXIF
+    panel) start at once instead of queueing behind a bulk scan.
+    """
+    budget = _get_budget()
+    threads = min(max(1, threads), budget.cores)
+    timeout = Environment().get_media_process_timeout_seconds()
+    if not interactive:
+        budget.acquire(threads)
+    killed = False
+    try:
+        return subprocess.run(command, capture_output=True, text=text, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        killed = True
+        logging.warning(f'Killed {command[0]} after {timeout:g}s: {" ".join(command)}')
+        empty = '' if text else b''
+        stderr = f'killed after {timeout:g}s'
+        return subprocess.CompletedProcess(command, -signal.SIGKILL, stdout=empty,
+                                           stderr=stderr if text else stderr.encode())
+    finally:
+        if not interactive:
+            budget.release(threads, killed)
+
+
+def get_media_process_stats() -> MediaProcessStats:
+    """Current load of the media-process budget: cores reserved, children running,
+    callers queued for cores, and children killed for exceeding the timeout."""
+    budget = _get_budget()
+    with budget.condition:
+        return MediaProcessStats(cores=budget.cores, cores_in_use=budget.in_use, running=budget.running,
+                                 waiting=len(budget.waiting), killed=budget.killed)
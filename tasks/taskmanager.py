@@ -57,6 +57,22 @@ class TaskManager:
         background_tasks.add_task(self.__start_task, task.id)
         return task
 
+    def run_task(self, request: TaskRequest) -> Task:
+        """Record and run a task synchronously on the calling thread. For work that is
+        triggered outside a request (e.g. the footage watcher) but should still show up
+        in the task list."""
+        now = datetime.now()
+        task = Task(
+            id=str(uuid.uuid4()),
+            status=TaskStatus.QUEUED,
+            scheduled_at=now,
+            last_updated=now,
+            **request.model_dump()
+        )
+        self._tasks[task.id] = task
+        self.__start_task(task.id)
+        return task
+
     def __start_task(self, task_id: str):
         if not task_id in self._tasks:
             return
@@ -1,6 +1,10 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from threading import Lock
-from typing import Callable, Iterable, TypeVar
+from typing import Callable, Iterable, Iterator, TypeVar
 
 from env.environment import Environment
 
@@ -9,6 +13,11 @@ R = TypeVar('R')
 
 _pool: ThreadPoolExecutor | None = None
 _pool_lock = Lock()
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_lock = Lock()
+_device_queues: dict[int, '_DeviceQueue'] = {}
+_device_limits: dict[int, int] | None = None
+_device_lock = Lock()
 
 
 def get_worker_pool() -> ThreadPoolExecutor:
@@ -28,18 +37,152 @@ def get_worker_pool() -> ThreadPoolExecutor:
     return _pool
 
 
-def parallel_map(items: Iterable[T], fn: Callable[[T], R]) -> list[R]:
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process-wide pool for CPU-bound jobs (hashing, image resizing) that the GIL would
+    otherwise serialise. Children are spawned rather than forked, since forking a process
+    that already runs worker and server threads can deadlock on inherited locks."""
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                size = Environment().get_process_pool_size()
+                _process_pool = ProcessPoolExecutor(max_workers=size,
+                                                    mp_context=multiprocessing.get_context('spawn'))
+    return _process_pool
+
+
+def get_executor(job: str | None = None) -> Executor:
+    """Executor configured for a job type (WORKER_BACKEND_<JOB>=thread|process).
+
+    Functions and arguments dispatched to the process pool must be picklable, i.e.
+    module-level functions rather than lambdas or closures.
+    """
+    if job is not None and Environment().get_worker_backend(job) == 'process':
+        return get_process_pool()
+    return get_worker_pool()
+
+
+def run_job(job: str, fn: Callable[..., R], *args) -> R:
+    """Run a single CPU-bound call on the executor configured for job, blocking until done.
+
+    Meant to be called from inside a worker-pool thread: the thread keeps doing the I/O
+    and bookkeeping, only fn itself moves to a process when the job is configured so.
+    """
+    if Environment().get_worker_backend(job) == 'process':
+        return get_process_pool().submit(fn, *args).result()
+    return fn(*args)
+
+
+def parallel_map(items: Iterable[T], fn: Callable[[T], R], job: str | None = None) -> list[R]:
     """Run fn over items on the shared worker pool, returning results in input order.
 
     Exceptions raised by fn propagate to the caller (first one wins). Callers that
-    need per-item failure isolation should swallow exceptions inside fn.
+    need per-item failure isolation should swallow exceptions inside fn. With a job
+    type, the executor is chosen through get_executor(job).
     """
     items = list(items)
     if not items:
         return []
     results: list[R] = [None] * len(items)  # type: ignore[list-item]
-    pool = get_worker_pool()
+    pool = get_executor(job)
     futures = {pool.submit(fn, item): i for i, item in enumerate(items)}
     for future in as_completed(futures):
         results[futures[future]] = future.result()
     return results
+
+
+class _DeviceQueue:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        self.waiting: deque[tuple[Future, Callable, tuple]] = deque()
+
+
+def device_overrides(overrides: dict[str, int]) -> dict[int, int]:
+    """Path-keyed overrides (e.g. DEVICE_IO_CONCURRENCY_OVERRIDES) keyed by the st_dev of each path."""
+    devices = {}
+    for mount, value in overrides.items():
+        try:
+            devices[os.stat(mount).st_dev] = value
+        except OSError:
+            logging.warning(f'Ignoring device override for missing path {mount}')
+    return devices
+
+
+def _device_limit(device: int) -> int:
+    global _device_limits
+    if _device_limits is None:
+        _device_limits = device_overrides(Environment().get_device_io_concurrency_overrides())
+    return _device_limits.get(device, Environment().get_device_io_concurrency())
+
+
+def submit_on_device(device: int, fn: Callable[..., R], *args) -> Future:
+    """Submit fn(*args) to the worker pool, at most DEVICE_IO_CONCURRENCY at a time per device.
+
+    device is the st_dev of the file fn reads. Work for a saturated device waits in a
+    per-device queue instead of occupying a pool thread, so a slow NAS never starves a
+    local SSD of workers while each disk still sees a sequential-friendly number of
+    concurrent readers.
+    """
+    future = Future()
+    with _device_lock:
+        queue = _device_queues.get(device)
+        if queue is None:
+            queue = _device_queues[device] = _DeviceQueue(_device_limit(device))
+        queue.waiting.append((future, fn, args))
+    _dispatch(device)
+    return future
+
+
+def _dispatch(device: int):
+    ready = []
+    with _device_lock:
+        queue = _device_queues[device]
+        while queue.running < queue.limit and queue.waiting:
+            queue.running += 1
+            ready.append(queue.waiting.popleft())
+    for future, fn, args in ready:
+        if not future.set_running_or_notify_cancel():
+            _release(device)
+            continue
+        inner = get_worker_pool().submit(fn, *args)
+        inner.add_done_callback(lambda f, future=future: _complete(device, future, f))
+
+
+def _complete(device: int, future: Future, inner: Future):
+    _release(device)
+    if inner.exception() is not None:
+        future.set_exception(inner.exception())
+    else:
+        future.set_result(inner.result())
+
+
+def _release(device: int):
+    with _device_lock:
+        _device_queues[device].running -= 1
+    _dispatch(device)
+
+
+def parallel_imap(items: Iterable[T], fn: Callable[[T], R], max_pending: int | None = None,
+                  job: str | None = None, device: Callable[[T], int] | None = None) -> Iterator[R]:
+    """Lazy parallel_map: yields results in input order while items are still being consumed.
+
+    At most max_pending (default: twice the pool size) calls are in flight, so chaining
+    several parallel_imap stages forms a pipeline with bounded queues between them and
+    memory stays flat no matter how many items the source iterable produces. With a
+    device key (e.g. the st_dev of the file an item reads), calls are additionally
+    limited per device through submit_on_device.
+    """
+    if max_pending is None:
+        max_pending = 2 * Environment().get_worker_pool_size()
+    pool = get_executor(job)
+    pending = deque()
+    for item in items:
+        if device is not None:
+            pending.append(submit_on_device(device(item), fn, item))
+        else:
+            pending.append(pool.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
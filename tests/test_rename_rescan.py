@@ -0,0 +1,23 @@
+from db.database import Database
+from db.scratch import scratch_database
+from scanner.scanner import Scanner
+
+
+def test_rescan_after_rename_reports_unchanged(tmp_path):
+    clip = tmp_path / 'C0001.mp4'
+    clip.write_bytes(b'footage' * 4096)
+    with scratch_database():
+        db = Database()
+        [scanned] = Scanner().scan_files([clip])
+        db.insert_scan_results([scanned])
+        db.insert_fingerprints([scanned])
+
+        clip.rename(tmp_path / 'Beach.mp4')
+        db.rename_file(scanned.md5_hash, 'Beach.mp4')
+
+        scanner = Scanner(find_fingerprints=db.get_fingerprints_for_paths)
+        [rescanned] = scanner.scan_directory(tmp_path)
+
+    assert (scanner.reused, scanner.hashed) == (1, 0)
+    assert rescanned.reused_hash
+    assert rescanned.md5_hash == scanned.md5_hash